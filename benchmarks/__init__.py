@@ -0,0 +1 @@
+"""Benchmarks for the Optimal Humidity integration."""
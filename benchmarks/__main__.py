@@ -0,0 +1,74 @@
+"""Run the benchmarks and print the results as JSON.
+
+Usage: python -m benchmarks [--rooms N] [--events N] [--memory-rooms N] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+
+from custom_components.optimal_humidity.const import VERSION
+
+from . import bench_calculations, bench_event_storm, bench_memory
+from .fake_hass import patched_integration
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument(
+        "--number", type=int, default=2000, help="calls per timing of a calculation"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="timings per calculation, best is kept"
+    )
+    parser.add_argument(
+        "--rooms", type=int, default=25, help="rooms of sensors in the event storm"
+    )
+    parser.add_argument(
+        "--events", type=int, default=10000, help="input changes in the event storm"
+    )
+    parser.add_argument(
+        "--memory-rooms", type=int, default=1000, help="rooms of sensors to measure"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the event storm")
+    parser.add_argument("--output", help="write the results to a file")
+    return parser.parse_args(argv)
+
+
+async def _async_main(args):
+    with patched_integration():
+        return {
+            "version": VERSION,
+            "python": platform.python_version(),
+            "calculations": await bench_calculations.async_run(
+                args.number, args.repeat
+            ),
+            "event_storm": await bench_event_storm.async_run(
+                args.rooms, args.events, args.seed
+            ),
+            "memory": await bench_memory.async_run(args.memory_rooms),
+        }
+
+
+def main(argv=None):
+    """Run the benchmarks."""
+    args = _parse_args(argv)
+    # Random inputs regularly make comfort impossible, which is logged as a warning.
+    logging.getLogger("custom_components.optimal_humidity").setLevel(logging.ERROR)
+
+    results = asyncio.run(_async_main(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
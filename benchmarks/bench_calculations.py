@@ -0,0 +1,141 @@
+"""Per-call latency of the calculation functions and of the full update chain."""
+
+import functools
+import itertools
+import timeit
+
+from homeassistant.const import PERCENTAGE, UnitOfPressure, UnitOfTemperature
+
+from custom_components.optimal_humidity import calculation
+from custom_components.optimal_humidity.const import (
+    ATTR_OPTIMAL_HUMIDITY,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+    METRIC_DEPENDENCIES,
+)
+
+from .fake_hass import FakeHass, async_setup_sensors
+
+INDOOR_TEMPERATURE = 21.3
+INDOOR_HUMIDITY = 47.2
+CRITICAL_TEMPERATURE = 14.8
+INDOOR_PRESSURE = 1009.5
+
+# Indoor temperature and humidity the chain alternates between, so every
+# update has inputs to calculate again.
+CHAIN_INPUTS = ((INDOOR_TEMPERATURE, INDOOR_HUMIDITY), (22.1, 44.6))
+
+# Size of the cache when it is enabled, as it is off by default.
+CACHE_SIZE = 512
+
+
+def _per_call(timer, number, repeat):
+    """Return the fastest time per call in microseconds."""
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+async def async_setup_room(math_engine, cache_size):
+    """Set up a started sensor for a room with fixed inputs."""
+    hass = FakeHass()
+    hass.states.async_set(
+        "sensor.temperature",
+        INDOOR_TEMPERATURE,
+        {"unit_of_measurement": UnitOfTemperature.CELSIUS},
+    )
+    hass.states.async_set(
+        "sensor.critical_temperature",
+        CRITICAL_TEMPERATURE,
+        {"unit_of_measurement": UnitOfTemperature.CELSIUS},
+    )
+    hass.states.async_set(
+        "sensor.humidity", INDOOR_HUMIDITY, {"unit_of_measurement": PERCENTAGE}
+    )
+    hass.states.async_set(
+        "sensor.pressure", INDOOR_PRESSURE, {"unit_of_measurement": UnitOfPressure.HPA}
+    )
+    (entity,) = await async_setup_sensors(
+        hass,
+        {
+            "platform": "optimal_humidity",
+            "math_engine": math_engine,
+            "cache_size": cache_size,
+            "sensors": {
+                "room": {
+                    "indoor_temp_sensor": "sensor.temperature",
+                    "critical_temp_sensor": "sensor.critical_temperature",
+                    "indoor_humidity_sensor": "sensor.humidity",
+                    "indoor_pressure_sensor": "sensor.pressure",
+                    "type": ATTR_OPTIMAL_HUMIDITY,
+                }
+            },
+        },
+    )
+    hass.async_start()
+    return entity
+
+
+async def async_run(number, repeat):
+    """Time every calculation function and the update chain.
+
+    Calculation functions are timed on their own with the metrics they depend
+    on already calculated, once per math engine, followed by calculating every
+    metric at once. The chain covers what an input change costs a
+    sensor: the state changes of its inputs, the engine update and reading
+    its state and attributes. It alternates between two sets of inputs, so
+    with the cache enabled every update after the first two is a hit.
+    """
+    results = {}
+    for math_engine in (MATH_ENGINE_PSYCHROLIB, MATH_ENGINE_FAST):
+        for cache_size in (0, CACHE_SIZE):
+            entity = await async_setup_room(math_engine, cache_size)
+            hass = entity.hass
+            engine = entity._engine
+            dict(engine.results)
+            chain_inputs = itertools.cycle(CHAIN_INPUTS)
+
+            def update_chain():
+                temperature, humidity = next(chain_inputs)
+                hass.states.async_set(
+                    "sensor.temperature",
+                    temperature,
+                    {"unit_of_measurement": UnitOfTemperature.CELSIUS},
+                )
+                hass.states.async_set(
+                    "sensor.humidity", humidity, {"unit_of_measurement": PERCENTAGE}
+                )
+                hass.loop.run_once()
+                return entity.state, entity.extra_state_attributes
+
+            scenario = {
+                "chain": _per_call(timeit.Timer(update_chain), number, repeat),
+            }
+            if not cache_size:
+                inputs = engine._inputs()
+                scenario["functions"] = {
+                    metric: _per_call(
+                        timeit.Timer(
+                            functools.partial(
+                                calculator,
+                                inputs,
+                                calculation._MATH_ENGINES[math_engine],
+                                *(
+                                    engine.get(dependency)
+                                    for dependency in METRIC_DEPENDENCIES[metric]
+                                ),
+                            )
+                        ),
+                        number,
+                        repeat,
+                    )
+                    for metric, calculator in calculation.CALCULATORS.items()
+                }
+                scenario["calculate"] = _per_call(
+                    timeit.Timer(functools.partial(calculation.calculate, inputs)),
+                    number,
+                    repeat,
+                )
+
+            key = f"{math_engine}/{'cache' if cache_size else 'no_cache'}"
+            results[key] = scenario
+
+    return {"unit": "us_per_call", "number": number, "repeat": repeat, **results}
@@ -0,0 +1,158 @@
+"""Throughput of many sensors under a storm of input state changes."""
+
+import random
+import time
+from datetime import timedelta
+
+from homeassistant.const import PERCENTAGE, UnitOfPressure, UnitOfTemperature
+
+from custom_components.optimal_humidity.const import (
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_DEWPOINT,
+    ATTR_HUMIDEX,
+    ATTR_OPTIMAL_HUMIDITY,
+    DOMAIN_DATA,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+)
+
+from .fake_hass import FakeHass, async_setup_sensors
+
+# Sensors set up for every room.
+ROOM_TYPES = (
+    ATTR_OPTIMAL_HUMIDITY,
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_DEWPOINT,
+    ATTR_HUMIDEX,
+)
+
+# Input, unit and range of the random values for every input sensor of a room.
+ROOM_INPUTS = {
+    "temperature": (UnitOfTemperature.CELSIUS, 18, 26),
+    "critical_temperature": (UnitOfTemperature.CELSIUS, 10, 18),
+    "humidity": (PERCENTAGE, 30, 65),
+    "pressure": (UnitOfPressure.HPA, 990, 1030),
+}
+
+# Input changes between timers firing when recalculations are delayed.
+BURST_SIZE = 10
+
+# Size of the cache when it is enabled, as it is off by default.
+CACHE_SIZE = 512
+
+SCENARIOS = {
+    "psychrolib": {"math_engine": MATH_ENGINE_PSYCHROLIB, "cache_size": 0},
+    "fast": {"math_engine": MATH_ENGINE_FAST, "cache_size": 0},
+    "cache": {
+        "math_engine": MATH_ENGINE_PSYCHROLIB,
+        "cache_size": CACHE_SIZE,
+    },
+    "coalesced": {
+        "math_engine": MATH_ENGINE_PSYCHROLIB,
+        "cache_size": 0,
+        "coalesce_window": timedelta(seconds=1),
+    },
+    "rate_limited": {
+        "math_engine": MATH_ENGINE_PSYCHROLIB,
+        "cache_size": 0,
+        "min_update_interval": timedelta(seconds=1),
+    },
+}
+
+
+def _input_entity_id(room, name):
+    return f"sensor.room_{room}_{name}"
+
+
+def _random_event(rng, rooms):
+    """Return a random input change as entity id, state and unit."""
+    room = rng.randrange(rooms)
+    name = rng.choice(tuple(ROOM_INPUTS))
+    unit, low, high = ROOM_INPUTS[name]
+    return _input_entity_id(room, name), round(rng.uniform(low, high), 1), unit
+
+
+def _random_device_update(rng, rooms):
+    """Return changes of every input of a random room, as one device reports."""
+    room = rng.randrange(rooms)
+    return [
+        (_input_entity_id(room, name), round(rng.uniform(low, high), 1), unit)
+        for name, (unit, low, high) in ROOM_INPUTS.items()
+    ]
+
+
+async def async_run_scenario(rooms, events, seed, options, device_updates=False):
+    """Set up rooms of sensors and return the results of an input storm.
+
+    Every input change is in an iteration of the event loop of its own, or
+    with device_updates all inputs of a room change in the same iteration.
+    """
+    rng = random.Random(seed)
+    hass = FakeHass()
+    sensors = {}
+    for room in range(rooms):
+        for name, (unit, low, high) in ROOM_INPUTS.items():
+            hass.states.async_set(
+                _input_entity_id(room, name),
+                round((low + high) / 2, 1),
+                {"unit_of_measurement": unit},
+            )
+        for sensor_type in ROOM_TYPES:
+            sensors[f"room_{room}_{sensor_type}"] = {
+                "indoor_temp_sensor": _input_entity_id(room, "temperature"),
+                "critical_temp_sensor": _input_entity_id(room, "critical_temperature"),
+                "indoor_humidity_sensor": _input_entity_id(room, "humidity"),
+                "indoor_pressure_sensor": _input_entity_id(room, "pressure"),
+                "type": sensor_type,
+            }
+
+    entities = await async_setup_sensors(
+        hass, {"platform": "optimal_humidity", "sensors": sensors, **options}
+    )
+    hass.async_start()
+    engines = list(hass.data[DOMAIN_DATA].values())
+    hass.states.writes = 0
+
+    if device_updates:
+        storm = [
+            _random_device_update(rng, rooms) for _ in range(events // len(ROOM_INPUTS))
+        ]
+    else:
+        storm = [[_random_event(rng, rooms)] for _ in range(events)]
+    events = sum(map(len, storm))
+    delayed = "coalesce_window" in options or "min_update_interval" in options
+    start = time.perf_counter()
+    for index, changes in enumerate(storm, 1):
+        for entity_id, state, unit in changes:
+            hass.states.async_set(entity_id, state, {"unit_of_measurement": unit})
+        hass.loop.run_once()
+        if delayed and not index % BURST_SIZE:
+            hass.run_timers()
+    hass.run_timers()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "rooms": rooms,
+        "entities": len(entities),
+        "events": events,
+        "seconds": elapsed,
+        "events_per_second": events / elapsed,
+        "state_writes": hass.states.writes,
+    }
+    cache = engines[0].cache
+    if cache is not None:
+        result["cache"] = cache.cache_info()._asdict()
+
+    return result
+
+
+async def async_run(rooms, events, seed=0):
+    """Run the input storm for every scenario."""
+    results = {
+        name: await async_run_scenario(rooms, events, seed, options)
+        for name, options in SCENARIOS.items()
+    }
+    results["device_updates"] = await async_run_scenario(
+        rooms, events, seed, SCENARIOS["psychrolib"], device_updates=True
+    )
+    return results
@@ -0,0 +1,80 @@
+"""Memory held per room and per sensor, measured with tracemalloc."""
+
+import gc
+import tracemalloc
+
+from custom_components.optimal_humidity.const import METRIC_DEPENDENCIES
+
+from .bench_event_storm import ROOM_INPUTS, ROOM_TYPES, _input_entity_id
+from .fake_hass import FakeHass, async_setup_sensors
+
+# Sensors set up for every room, as separate sensors or as a sensor per metric.
+LAYOUTS = {
+    "sensors": lambda room, inputs: {
+        f"room_{room}_{sensor_type}": {**inputs, "type": sensor_type}
+        for sensor_type in ROOM_TYPES
+    },
+    "monitored_conditions": lambda room, inputs: {
+        f"room_{room}": {**inputs, "monitored_conditions": list(METRIC_DEPENDENCIES)}
+    },
+}
+
+
+def _traced_memory():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def async_run_layout(rooms, layout):
+    """Set up rooms of sensors and return the memory they hold once updated.
+
+    Input states are set before measuring, so only what the integration
+    allocates for the rooms is counted: engines, entities, their latest
+    results and the states written for them.
+    """
+    hass = FakeHass()
+    sensors = {}
+    for room in range(rooms):
+        for name, (unit, low, high) in ROOM_INPUTS.items():
+            # Distinct inputs for every room, so no results are shared.
+            hass.states.async_set(
+                _input_entity_id(room, name),
+                round(low + (high - low) * room / rooms, 3),
+                {"unit_of_measurement": unit},
+            )
+        sensors.update(
+            LAYOUTS[layout](
+                room,
+                {
+                    "indoor_temp_sensor": _input_entity_id(room, "temperature"),
+                    "critical_temp_sensor": _input_entity_id(
+                        room, "critical_temperature"
+                    ),
+                    "indoor_humidity_sensor": _input_entity_id(room, "humidity"),
+                    "indoor_pressure_sensor": _input_entity_id(room, "pressure"),
+                },
+            )
+        )
+    config = {"platform": "optimal_humidity", "sensors": sensors, "cache_size": 0}
+
+    tracemalloc.start()
+    try:
+        before = _traced_memory()
+        entities = await async_setup_sensors(hass, config)
+        hass.async_start()
+        after = _traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rooms": rooms,
+        "entities": len(entities),
+        "bytes": after - before,
+        "bytes_per_room": (after - before) / rooms,
+        "bytes_per_entity": (after - before) / len(entities),
+    }
+
+
+async def async_run(rooms):
+    """Measure the memory of every layout of sensors."""
+    return {layout: await async_run_layout(rooms, layout) for layout in LAYOUTS}
@@ -0,0 +1,258 @@
+"""Lightweight stand-in for Home Assistant to drive sensors in benchmarks.
+
+Only implements what the integration touches: the state machine, the event
+bus, state change tracking, timers, iterations of the event loop and writing
+and restoring entity states.
+The reload service is not set up and repairs issues are not raised.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.util.unit_system import METRIC_SYSTEM
+
+from custom_components.optimal_humidity import engine as engine_module
+from custom_components.optimal_humidity import sensor as sensor_module
+
+
+class FakeState:
+    """State of an entity."""
+
+    __slots__ = ("entity_id", "state", "attributes")
+
+    def __init__(self, entity_id, state, attributes=None):
+        """Initialize the state."""
+        self.entity_id = entity_id
+        self.state = state
+        self.attributes = attributes or {}
+
+
+class FakeEvent:
+    """Event passed to listeners."""
+
+    __slots__ = ("event_type", "data")
+
+    def __init__(self, event_type, data):
+        """Initialize the event."""
+        self.event_type = event_type
+        self.data = data
+
+
+class FakeStates:
+    """State machine that notifies trackers of state changes."""
+
+    def __init__(self):
+        """Initialize the state machine."""
+        self._states = {}
+        self._trackers = defaultdict(list)
+        self.writes = 0
+
+    def get(self, entity_id):
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def async_available(self, entity_id):
+        """Return whether an entity id is still free."""
+        return entity_id not in self._states
+
+    def async_set(self, entity_id, state, attributes=None):
+        """Set the state of an entity and notify its trackers."""
+        old_state = self._states.get(entity_id)
+        new_state = self._states[entity_id] = FakeState(entity_id, state, attributes)
+        event = FakeEvent(
+            "state_changed",
+            {"entity_id": entity_id, "old_state": old_state, "new_state": new_state},
+        )
+        for action in list(self._trackers[entity_id]):
+            action(event)
+
+    def track(self, entity_ids, action):
+        """Call action with every state change of the given entities."""
+        for entity_id in entity_ids:
+            self._trackers[entity_id].append(action)
+
+        def unsubscribe():
+            for entity_id in entity_ids:
+                self._trackers[entity_id].remove(action)
+
+        return unsubscribe
+
+
+class FakeBus:
+    """Event bus with one-time listeners."""
+
+    def __init__(self):
+        """Initialize the bus."""
+        self._listeners = defaultdict(list)
+
+    def async_listen_once(self, event_type, listener):
+        """Listen for the next event of a type."""
+        self._listeners[event_type].append(listener)
+        return lambda: self._listeners[event_type].remove(listener)
+
+    def async_fire(self, event_type, data=None):
+        """Fire an event."""
+        listeners, self._listeners[event_type] = self._listeners[event_type], []
+        for listener in listeners:
+            listener(FakeEvent(event_type, data or {}))
+
+
+class FakeLoop:
+    """Event loop that runs callbacks when an iteration is run."""
+
+    def __init__(self):
+        """Initialize the loop."""
+        self._ready = []
+
+    def call_soon(self, callback, *args):
+        """Call a callback in the next iteration."""
+        self._ready.append((callback, args))
+
+    def run_once(self):
+        """Run the callbacks scheduled so far, like an iteration of the loop."""
+        ready, self._ready = self._ready, []
+        for callback, args in ready:
+            callback(*args)
+
+
+def _run_coroutine(coroutine):
+    """Run a coroutine that only yields to the loop to its end."""
+    try:
+        while True:
+            coroutine.send(None)
+    except StopIteration:
+        pass
+
+
+class FakeHass:
+    """Home Assistant instance with just enough behaviour for the sensors."""
+
+    def __init__(self, elevation=0):
+        """Initialize the instance."""
+        self.config = SimpleNamespace(elevation=elevation, units=METRIC_SYSTEM)
+        self.data = {}
+        self.states = FakeStates()
+        self.bus = FakeBus()
+        self.loop = FakeLoop()
+        self.timers = []
+        self.is_running = False
+
+    def async_start(self):
+        """Fire the start event."""
+        self.is_running = True
+        self.bus.async_fire(EVENT_HOMEASSISTANT_START)
+
+    def async_create_task(self, target):
+        """Run a coroutine in the next iteration of the loop."""
+        self.loop.call_soon(_run_coroutine, target)
+
+    def run_timers(self):
+        """Run every pending timer immediately."""
+        timers, self.timers = self.timers, []
+        for action in timers:
+            action(None)
+
+
+def _async_track_state_change_event(hass, entity_ids, action):
+    return hass.states.track(list(entity_ids), action)
+
+
+def _async_call_later(hass, _delay, action):
+    hass.timers.append(action)
+    return lambda: hass.timers.remove(action)
+
+
+def _async_track_time_interval(hass, action, _interval):
+    """Leave periodic actions out, as benchmarks do not run long enough."""
+    return lambda: None
+
+
+def _async_create_issue(hass, domain, issue_id, **kwargs):
+    """Leave repairs issues out, as benchmarks have no issue registry."""
+
+
+def _async_delete_issue(hass, domain, issue_id):
+    """Leave repairs issues out, as benchmarks have no issue registry."""
+
+
+async def _async_setup_reload_service(hass, domain, platforms):
+    """Leave the reload service out, as benchmarks never reload."""
+
+
+async def _async_get_last_state(self):
+    """Start without a restored state."""
+    return None
+
+
+async def _async_get_last_extra_data(self):
+    """Start without restored data."""
+    return None
+
+
+def _async_write_ha_state(self):
+    """Read what Home Assistant reads when writing a state and count it."""
+    state = self.state if self.available else "unavailable"
+    attributes = dict(self.extra_state_attributes or {})
+    attributes["unit_of_measurement"] = self.unit_of_measurement
+    self.hass.states.writes += 1
+    self.hass.states._states[self.entity_id] = FakeState(
+        self.entity_id, state, attributes
+    )
+
+
+@contextmanager
+def patched_integration():
+    """Route the integration's Home Assistant helpers to the fakes."""
+    originals = (
+        engine_module.async_track_state_change_event,
+        engine_module.async_call_later,
+        engine_module.async_track_time_interval,
+        engine_module.async_create_issue,
+        engine_module.async_delete_issue,
+        sensor_module.OptimalHumidity.async_write_ha_state,
+        sensor_module.OptimalHumidity.async_get_last_state,
+        sensor_module.OptimalHumidity.async_get_last_extra_data,
+        sensor_module.async_setup_reload_service,
+    )
+    engine_module.async_track_state_change_event = _async_track_state_change_event
+    engine_module.async_call_later = _async_call_later
+    engine_module.async_track_time_interval = _async_track_time_interval
+    engine_module.async_create_issue = _async_create_issue
+    engine_module.async_delete_issue = _async_delete_issue
+    sensor_module.OptimalHumidity.async_write_ha_state = _async_write_ha_state
+    sensor_module.OptimalHumidity.async_get_last_state = _async_get_last_state
+    sensor_module.OptimalHumidity.async_get_last_extra_data = _async_get_last_extra_data
+    sensor_module.async_setup_reload_service = _async_setup_reload_service
+    try:
+        yield
+    finally:
+        (
+            engine_module.async_track_state_change_event,
+            engine_module.async_call_later,
+            engine_module.async_track_time_interval,
+            engine_module.async_create_issue,
+            engine_module.async_delete_issue,
+            sensor_module.OptimalHumidity.async_write_ha_state,
+            sensor_module.OptimalHumidity.async_get_last_state,
+            sensor_module.OptimalHumidity.async_get_last_extra_data,
+            sensor_module.async_setup_reload_service,
+        ) = originals
+
+
+async def async_setup_sensors(hass, config):
+    """Set up the sensor platform with a configuration and return its entities."""
+    entities = []
+
+    def async_add_entities(new_entities, _update_before_add=False):
+        entities.extend(new_entities)
+
+    await sensor_module.async_setup_platform(
+        hass, sensor_module.PLATFORM_SCHEMA(config), async_add_entities
+    )
+    for entity in entities:
+        entity.hass = hass
+        await entity.async_added_to_hass()
+
+    return entities
@@ -1 +1,20 @@
 """Calculates optimal humidity given critical temperature, current temperature and current humidity."""
+
+from .const import PLATFORMS
+
+
+async def async_setup_entry(hass, entry):
+    """Set up the sensors of a room added from the UI."""
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    return True
+
+
+async def async_unload_entry(hass, entry):
+    """Unload the sensors of a room added from the UI."""
+    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+
+async def async_reload_entry(hass, entry):
+    """Reload the sensors of a room once its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
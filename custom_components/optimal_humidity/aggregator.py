@@ -0,0 +1,80 @@
+"""Aggregates repeated warnings, so a flapping sensor does not flood the log."""
+
+import time
+
+from .const import WARNING_SUMMARY_INTERVAL
+
+_AGGREGATORS = []
+
+
+def flush_warnings():
+    """Log the due summaries of every aggregator and forget quiet warnings."""
+    for aggregator in _AGGREGATORS:
+        aggregator.flush()
+
+
+class WarningAggregator:
+    """Logs the first of repeated warnings, then at most one per interval.
+
+    Warnings are told apart by a key, such as an entity and what is wrong
+    with its state. A warning repeated within the interval is only counted,
+    and logged with how often it occurred once the interval has passed,
+    either when it occurs again or when the aggregator is flushed. Messages
+    are only formatted when they are logged.
+    """
+
+    __slots__ = ("_logger", "_interval", "_warnings")
+
+    def __init__(self, logger, interval=WARNING_SUMMARY_INTERVAL):
+        """Initialize the aggregator."""
+        self._logger = logger
+        self._interval = interval
+        # Time the warning of a key was last logged, how often it occurred
+        # since, and the message and arguments of the latest occurrence.
+        self._warnings = {}
+        _AGGREGATORS.append(self)
+
+    def warning(self, key, msg, *args):
+        """Log a warning, unless one with the same key was logged recently."""
+        now = time.monotonic()
+        logged = self._warnings.get(key)
+        if logged is None:
+            self._warnings[key] = [now, 0, msg, args]
+            self._logger.warning(msg, *args)
+            return
+
+        logged[1] += 1
+        logged[2] = msg
+        logged[3] = args
+        if now - logged[0] >= self._interval:
+            self._log(logged, now)
+
+    def flush(self):
+        """Log the summaries that are due and forget warnings that stopped.
+
+        A warning that did not occur since it was last logged, an interval
+        ago or more, is forgotten, so its next occurrence is logged in full.
+        """
+        now = time.monotonic()
+        for key, logged in list(self._warnings.items()):
+            if now - logged[0] < self._interval:
+                continue
+            if logged[1]:
+                self._log(logged, now)
+            else:
+                del self._warnings[key]
+
+    def _log(self, logged, now):
+        """Log the latest occurrence of a warning with how often it occurred."""
+        last_logged, count, msg, args = logged
+        logged[0] = now
+        logged[1] = 0
+        if count > 1:
+            self._logger.warning(
+                f"{msg} (occurred %s times in the last %.0f s)",
+                *args,
+                count,
+                now - last_logged,
+            )
+        else:
+            self._logger.warning(msg, *args)
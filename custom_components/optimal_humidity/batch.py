@@ -0,0 +1,349 @@
+"""Vectorized calculation of every metric for many rooms at once.
+
+Requires numpy, which is not a requirement of the integration itself.
+"""
+
+import numpy as np
+
+from . import fastmath
+from .const import (
+    ATTR_COMFORTABLE_HUMIDITY,
+    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_DEWPOINT,
+    ATTR_HUMIDEX,
+    ATTR_HUMIDEX_COMFORT,
+    ATTR_MOLD_WARNING,
+    ATTR_OPTIMAL_HUMIDEX,
+    ATTR_OPTIMAL_HUMIDITY,
+    ATTR_SPECIFIC_HUMIDITY,
+    COMFORTABLE_PRESSURE_RESOLUTION,
+    HUMIDEX_COMFORT_BREAK_POINTS,
+    HUMIDEX_COMFORT_LEVELS,
+    IDEAL_HUMIDITY,
+    IDEAL_TEMPERATURE,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+)
+from .psychrometrics import (
+    BOUNDS,
+    MAX_ITER_COUNT,
+    MIN_HUM_RATIO,
+    TOLERANCE,
+    TRIPLE_POINT_WATER,
+    ZERO_CELSIUS_AS_KELVIN,
+)
+
+RESULT_DTYPE = np.dtype(
+    [
+        (ATTR_DEWPOINT, np.float64),
+        (ATTR_SPECIFIC_HUMIDITY, np.float64),
+        (ATTR_OPTIMAL_HUMIDITY, np.float64),
+        (ATTR_CRITICAL_HUMIDITY, np.float64),
+        (ATTR_MOLD_WARNING, np.float64),
+        (ATTR_HUMIDEX, np.float64),
+        (ATTR_HUMIDEX_COMFORT, f"U{max(map(len, HUMIDEX_COMFORT_LEVELS))}"),
+        (ATTR_COMFORTABLE_SPECIFIC_HUMIDITY, np.float64),
+        (ATTR_OPTIMAL_HUMIDEX, np.float64),
+        (ATTR_COMFORTABLE_HUMIDITY, np.float64),
+    ]
+)
+
+_FAST_TEMPERATURES = fastmath.MIN_TEMPERATURE + fastmath.TEMPERATURE_STEP * np.arange(
+    len(fastmath.SAT_VAP_PRES_TABLE)
+)
+_FAST_SAT_VAP_PRES = np.array(fastmath.SAT_VAP_PRES_TABLE)
+
+
+def calculate(
+    indoor_temp,
+    indoor_hum,
+    crit_temp,
+    pressure,
+    comfortable_specific_humidity=None,
+    math_engine=MATH_ENGINE_PSYCHROLIB,
+):
+    """Calculate every metric for arrays of inputs.
+
+    Temperatures are in °C, indoor_hum is a relative humidity between 0 and
+    1, pressure is in Pa and comfortable_specific_humidity overrides the
+    calculated value in mg_H₂O g_Air⁻¹. Inputs are broadcast against each
+    other and NaN marks a missing value.
+
+    Returns a structured array of RESULT_DTYPE, with NaN (or an empty
+    humidex_comfort) wherever the sensor would be unavailable and
+    mold_warning as 1.0 or 0.0.
+    """
+    indoor_temp, indoor_hum, crit_temp, pressure, comfortable = np.broadcast_arrays(
+        *(
+            np.asarray(value, dtype=np.float64)
+            for value in (
+                indoor_temp,
+                indoor_hum,
+                crit_temp,
+                pressure,
+                (
+                    np.nan
+                    if comfortable_specific_humidity is None
+                    else comfortable_specific_humidity
+                ),
+            )
+        )
+    )
+    if math_engine == MATH_ENGINE_FAST:
+        sat_vap_pres = _fast_sat_vap_pres
+        dewpoint_from_vap_pres = _fast_dewpoint_from_vap_pres
+    else:
+        sat_vap_pres = _sat_vap_pres
+        dewpoint_from_vap_pres = _dewpoint_from_vap_pres
+
+    results = np.empty(indoor_temp.shape, dtype=RESULT_DTYPE)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid_hum = (indoor_hum >= 0) & (indoor_hum <= 1)
+        indoor_vap_pres = np.where(
+            valid_hum, indoor_hum * sat_vap_pres(indoor_temp), np.nan
+        )
+
+        dewpoint = _round(dewpoint_from_vap_pres(indoor_temp, indoor_vap_pres), 2)
+        results[ATTR_DEWPOINT] = dewpoint
+
+        crit_hum = np.where(
+            dewpoint > crit_temp,
+            100.0,
+            sat_vap_pres(dewpoint) / sat_vap_pres(crit_temp) * 100,
+        )
+        crit_hum = np.where(np.isnan(dewpoint) | np.isnan(crit_temp), np.nan, crit_hum)
+        results[ATTR_CRITICAL_HUMIDITY] = _clamp(crit_hum, 0, 100, 1)
+
+        results[ATTR_SPECIFIC_HUMIDITY] = _round(
+            _specific_hum_from_hum_ratio(
+                _hum_ratio_from_vap_pres(sat_vap_pres(dewpoint), pressure)
+            )
+            * 1000,
+            2,
+        )
+
+        comfortable = np.where(
+            np.isnan(comfortable),
+            _round(
+                _specific_hum_from_hum_ratio(
+                    _hum_ratio_from_vap_pres(
+                        IDEAL_HUMIDITY * sat_vap_pres(np.float64(IDEAL_TEMPERATURE)),
+                        np.round(pressure / COMFORTABLE_PRESSURE_RESOLUTION)
+                        * COMFORTABLE_PRESSURE_RESOLUTION,
+                    )
+                )
+                * 1000,
+                2,
+            ),
+            comfortable,
+        )
+        results[ATTR_COMFORTABLE_SPECIFIC_HUMIDITY] = comfortable
+
+        comfortable_hum_ratio = comfortable / 1000
+        comfortable_hum_ratio = np.maximum(
+            comfortable_hum_ratio / (1.0 - comfortable_hum_ratio), MIN_HUM_RATIO
+        )
+        comfortable_humidity = (
+            pressure
+            * comfortable_hum_ratio
+            / (0.621945 + comfortable_hum_ratio)
+            / sat_vap_pres(indoor_temp)
+            * 100
+        )
+        comfortable_humidity = _round(np.minimum(comfortable_humidity, 100), 2)
+        results[ATTR_COMFORTABLE_HUMIDITY] = comfortable_humidity
+
+        comfortable_dewpoint = dewpoint_from_vap_pres(
+            indoor_temp, comfortable_humidity / 100 * sat_vap_pres(indoor_temp)
+        )
+        critical_humidity = np.where(
+            comfortable_dewpoint > crit_temp,
+            1.0,
+            sat_vap_pres(comfortable_dewpoint) / sat_vap_pres(crit_temp),
+        )
+        mold_dewpoint = dewpoint_from_vap_pres(crit_temp, 0.6 * sat_vap_pres(crit_temp))
+        optimal_humidity = np.where(
+            critical_humidity > 0.6,
+            np.where(
+                mold_dewpoint > indoor_temp,
+                np.nan,
+                sat_vap_pres(mold_dewpoint) / sat_vap_pres(indoor_temp) * 100,
+            ),
+            comfortable_humidity,
+        )
+        optimal_humidity = np.where(
+            np.isnan(crit_temp) | np.isnan(comfortable_humidity),
+            np.nan,
+            optimal_humidity,
+        )
+        optimal_humidity = _clamp(optimal_humidity, 0, 60, 1)
+        results[ATTR_OPTIMAL_HUMIDITY] = optimal_humidity
+
+        results[ATTR_OPTIMAL_HUMIDEX] = _round(
+            _humidex(indoor_temp, optimal_humidity / 100 * sat_vap_pres(indoor_temp)),
+            2,
+        )
+
+        humidex = _round(_humidex(indoor_temp, indoor_vap_pres), 2)
+        results[ATTR_HUMIDEX] = humidex
+        results[ATTR_HUMIDEX_COMFORT] = np.where(
+            np.isnan(humidex),
+            "",
+            np.asarray(HUMIDEX_COMFORT_LEVELS)[
+                np.searchsorted(
+                    HUMIDEX_COMFORT_BREAK_POINTS,
+                    np.nan_to_num(humidex) - 1,
+                    side="right",
+                ).clip(max=len(HUMIDEX_COMFORT_LEVELS) - 1)
+            ],
+        )
+
+        results[ATTR_MOLD_WARNING] = np.where(
+            np.isnan(indoor_hum) | np.isnan(crit_hum),
+            np.nan,
+            ((indoor_hum > 0.6) | (results[ATTR_CRITICAL_HUMIDITY] > 60)).astype(
+                np.float64
+            ),
+        )
+
+    return results
+
+
+def _round(values, decimals):
+    """Round like the engine does when storing a result.
+
+    np.round rounds ties to even on the scaled value, while formatting rounds
+    the exact binary value, so near ties are formatted to match the engine.
+    """
+    rounded = np.array(np.round(values, decimals))
+    scaled = values * 10**decimals
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [
+            float(f"{value:.{decimals}f}") for value in np.asarray(values)[near_tie]
+        ]
+    return rounded
+
+
+def _clamp(values, lower, upper, decimals):
+    """Clamp a percentage to its range and round it like the engine does."""
+    return np.where(
+        values > upper,
+        upper,
+        np.where(values < lower, lower, _round(values, decimals)),
+    )
+
+
+def _humidex(temperature, vap_pres):
+    """Calculate humidex given temperature and water vapor pressure in Pa."""
+    return temperature + 0.5555 * (vap_pres * 0.01 - 10)
+
+
+def _hum_ratio_from_vap_pres(vap_pres, pressure):
+    return np.maximum(0.621945 * vap_pres / (pressure - vap_pres), MIN_HUM_RATIO)
+
+
+def _specific_hum_from_hum_ratio(hum_ratio):
+    hum_ratio = np.maximum(hum_ratio, MIN_HUM_RATIO)
+    return hum_ratio / (1.0 + hum_ratio)
+
+
+def _ln_sat_vap_pres(temperature):
+    """Natural log of saturation vapor pressure (ASHRAE 2017 ch. 1 eqn 5 & 6)."""
+    kelvin = temperature + ZERO_CELSIUS_AS_KELVIN
+    return np.where(
+        temperature <= TRIPLE_POINT_WATER,
+        -5.6745359e03 / kelvin
+        + 6.3925247
+        - 9.677843e-03 * kelvin
+        + 6.2215701e-07 * kelvin**2
+        + 2.0747825e-09 * kelvin**3
+        - 9.484024e-13 * kelvin**4
+        + 4.1635019 * np.log(kelvin),
+        -5.8002206e03 / kelvin
+        + 1.3914993
+        - 4.8640239e-02 * kelvin
+        + 4.1764768e-05 * kelvin**2
+        - 1.4452093e-08 * kelvin**3
+        + 6.5459673 * np.log(kelvin),
+    )
+
+
+def _d_ln_sat_vap_pres(temperature):
+    """Derivative of the natural log of saturation vapor pressure."""
+    kelvin = temperature + ZERO_CELSIUS_AS_KELVIN
+    return np.where(
+        temperature <= TRIPLE_POINT_WATER,
+        5.6745359e03 / kelvin**2
+        - 9.677843e-03
+        + 2 * 6.2215701e-07 * kelvin
+        + 3 * 2.0747825e-09 * kelvin**2
+        - 4 * 9.484024e-13 * kelvin**3
+        + 4.1635019 / kelvin,
+        5.8002206e03 / kelvin**2
+        - 4.8640239e-02
+        + 2 * 4.1764768e-05 * kelvin
+        - 3 * 1.4452093e-08 * kelvin**2
+        + 6.5459673 / kelvin,
+    )
+
+
+def _sat_vap_pres(temperature):
+    """Saturation vapor pressure in Pa, NaN outside the valid range of the equations."""
+    return np.where(
+        (temperature >= BOUNDS[0]) & (temperature <= BOUNDS[1]),
+        np.exp(_ln_sat_vap_pres(temperature)),
+        np.nan,
+    )
+
+
+def _dewpoint_from_vap_pres(temperature, vap_pres):
+    """Dew point using the same Newton-Raphson iteration as the psychrometrics module."""
+    valid = np.asarray(
+        (vap_pres >= _sat_vap_pres(np.float64(BOUNDS[0])))
+        & (vap_pres <= _sat_vap_pres(np.float64(BOUNDS[1])))
+        & ~np.isnan(temperature)
+    )
+    ln_vap_pres = np.log(np.where(valid, vap_pres, 1.0))
+    dewpoint = np.where(valid, temperature, np.nan)
+    active = valid.copy()
+
+    for _ in range(MAX_ITER_COUNT):
+        if not active.any():
+            break
+        current = dewpoint[active]
+        estimate = current - (
+            _ln_sat_vap_pres(current) - ln_vap_pres[active]
+        ) / _d_ln_sat_vap_pres(current)
+        estimate = np.clip(estimate, *BOUNDS)
+        dewpoint[active] = estimate
+        converged = np.abs(estimate - current) <= TOLERANCE
+        active[active] = ~converged
+
+    dewpoint[active] = np.nan
+    return np.minimum(dewpoint, temperature)
+
+
+def _fast_sat_vap_pres(temperature):
+    """Saturation vapor pressure interpolated from the fast math table."""
+    inside = (temperature >= fastmath.MIN_TEMPERATURE) & (
+        temperature <= fastmath.MAX_TEMPERATURE
+    )
+    return np.where(
+        inside,
+        np.interp(temperature, _FAST_TEMPERATURES, _FAST_SAT_VAP_PRES),
+        _sat_vap_pres(temperature),
+    )
+
+
+def _fast_dewpoint_from_vap_pres(temperature, vap_pres):
+    """Dew point interpolated from the inverted fast math table."""
+    inside = (vap_pres >= _FAST_SAT_VAP_PRES[0]) & (vap_pres <= _FAST_SAT_VAP_PRES[-1])
+    dewpoint = np.interp(vap_pres, _FAST_SAT_VAP_PRES, _FAST_TEMPERATURES)
+    if not inside.all():
+        dewpoint = np.where(
+            inside, dewpoint, _dewpoint_from_vap_pres(temperature, vap_pres)
+        )
+    return np.minimum(dewpoint, temperature)
@@ -0,0 +1,54 @@
+"""Bounded cache of calculation results keyed on quantized inputs."""
+
+from collections import OrderedDict, namedtuple
+
+from .calculation import new_values
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def quantize(value, resolution):
+    """Round a measurement to a multiple of the given resolution."""
+    if value is None:
+        return None
+    return round(round(value / resolution) * resolution, 10)
+
+
+class CalculationCache:
+    """Least recently used cache of the metrics calculated for a set of inputs.
+
+    Entries are the metric values of a calculation, as returned by
+    new_values(), that the engine fills in as metrics are calculated, so a
+    hit returns every metric calculated for those inputs so far.
+    """
+
+    def __init__(self, maxsize):
+        """Initialize the cache."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, key):
+        """Return the entry for a key, adding an empty one if it is missing."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = self._entries[key] = new_values()
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def cache_info(self):
+        """Return hit and miss counters in the same form as functools.lru_cache."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,459 @@
+"""Calculation of every metric from a set of inputs, without Home Assistant.
+
+Inputs and results are plain records that can be pickled, for example to
+calculate in a process pool. Every metric is calculated by a function that
+takes the inputs, the math engine and the metrics it depends on, following
+METRIC_DEPENDENCIES.
+"""
+
+import bisect
+import functools
+import logging
+from typing import NamedTuple, Optional
+
+from . import fastmath, psychrometrics
+from .aggregator import WarningAggregator
+from .const import (
+    ATTR_COMFORTABLE_HUMIDITY,
+    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_DEWPOINT,
+    ATTR_HUMIDEX,
+    ATTR_HUMIDEX_COMFORT,
+    ATTR_MOLD_WARNING,
+    ATTR_OPTIMAL_HUMIDEX,
+    ATTR_OPTIMAL_HUMIDITY,
+    ATTR_SPECIFIC_HUMIDITY,
+    COMFORTABLE_PRESSURE_RESOLUTION,
+    HUMIDEX_COMFORT_BREAK_POINTS,
+    HUMIDEX_COMFORT_LEVELS,
+    IDEAL_HUMIDITY,
+    IDEAL_TEMPERATURE,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+    METRIC_DEPENDENCIES,
+    METRIC_INPUTS,
+    MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR,
+)
+
+_LOGGER = logging.getLogger(__name__)
+# Warnings about the calculation, by room and the metric that can not be reached.
+_WARNINGS = WarningAggregator(_LOGGER)
+
+_MATH_ENGINES = {
+    MATH_ENGINE_PSYCHROLIB: psychrometrics,
+    MATH_ENGINE_FAST: fastmath,
+}
+
+_METRIC_INDEXES = {metric: index for index, metric in enumerate(METRIC_DEPENDENCIES)}
+_NOT_CALCULATED = object()
+
+
+class CalculationInputs(NamedTuple):
+    """Inputs of the calculation, None where a sensor has no valid state.
+
+    Temperatures are in °C, indoor_hum is a relative humidity between 0 and
+    1, pressure is in Pa and comfortable_specific_humidity overrides the
+    calculated value in mg_H₂O g_Air⁻¹.
+    """
+
+    indoor_temp: Optional[float]
+    indoor_hum: Optional[float]
+    crit_temp: Optional[float]
+    pressure: Optional[float]
+    comfortable_specific_humidity: Optional[float] = None
+    math_engine: str = MATH_ENGINE_PSYCHROLIB
+
+
+class CalculationResults(NamedTuple):
+    """Every metric, None where it can not be calculated."""
+
+    dewpoint: Optional[float]
+    specific_humidity: Optional[float]
+    optimal_humidity: Optional[float]
+    critical_humidity: Optional[float]
+    mold_warning: Optional[bool]
+    humidex: Optional[float]
+    humidex_comfort: Optional[str]
+    comfortable_specific_humidity: Optional[float]
+    optimal_humidex: Optional[float]
+    comfortable_humidity: Optional[float]
+
+
+def _affected_metrics(field):
+    """Return the indexes of the metrics that use an input, directly or not."""
+    affected = {metric for metric, fields in METRIC_INPUTS.items() if field in fields}
+    while True:
+        dependents = {
+            metric
+            for metric, dependencies in METRIC_DEPENDENCIES.items()
+            if affected.intersection(dependencies)
+        }
+        if dependents <= affected:
+            return tuple(sorted(_METRIC_INDEXES[metric] for metric in affected))
+        affected |= dependents
+
+
+def calculate(inputs):
+    """Calculate every metric for a set of inputs."""
+    return Calculation(inputs).results()
+
+
+def new_values():
+    """Return the storage of a calculation with no metric calculated yet."""
+    return [_NOT_CALCULATED] * len(METRIC_DEPENDENCIES)
+
+
+class Calculation:
+    """Calculates metrics for a set of inputs when they are first requested."""
+
+    __slots__ = ("inputs", "values", "room", "_psychrometrics")
+
+    def __init__(self, inputs, values=None, room=None):
+        """Initialize the calculation.
+
+        values is a list with the value of every metric in the order of
+        METRIC_DEPENDENCIES, as returned by new_values(). Metrics are stored
+        in it as they are calculated, and metrics already in it are not
+        calculated again. room is any key of the room the inputs are from,
+        so warnings about one room do not hold back those about another.
+        """
+        self.inputs = inputs
+        self.values = new_values() if values is None else values
+        self.room = room
+        self._psychrometrics = _MATH_ENGINES[inputs.math_engine]
+
+    def __getstate__(self):
+        return (
+            self.inputs,
+            {
+                metric: value
+                for metric, value in zip(METRIC_DEPENDENCIES, self.values)
+                if value is not _NOT_CALCULATED
+            },
+            self.room,
+        )
+
+    def __setstate__(self, state):
+        inputs, calculated, room = state
+        self.__init__(inputs, room=room)
+        for metric, value in calculated.items():
+            self.values[_METRIC_INDEXES[metric]] = value
+
+    def get(self, metric):
+        """Return a metric, calculating it and its dependencies if needed."""
+        index = _METRIC_INDEXES[metric]
+        value = self.values[index]
+        if value is _NOT_CALCULATED:
+            dependencies = (
+                self.get(dependency) for dependency in METRIC_DEPENDENCIES[metric]
+            )
+            if metric in _WARNING_METRICS:
+                value = CALCULATORS[metric](
+                    self.inputs, self._psychrometrics, *dependencies, room=self.room
+                )
+            else:
+                value = CALCULATORS[metric](
+                    self.inputs, self._psychrometrics, *dependencies
+                )
+            self.values[index] = value
+        return value
+
+    def changed(self, inputs, values=None):
+        """Return the calculation for new inputs.
+
+        Metrics calculated here that the changed inputs do not affect, even
+        through the metrics they depend on, are kept where values does not
+        have them yet, so only what changed is calculated again.
+        """
+        if values is None:
+            values = new_values()
+        affected = set()
+        for field, old, new in zip(CalculationInputs._fields, self.inputs, inputs):
+            if old != new:
+                affected.update(_AFFECTED_METRICS[field])
+        for index, value in enumerate(self.values):
+            if index not in affected and values[index] is _NOT_CALCULATED:
+                values[index] = value
+        return Calculation(inputs, values, self.room)
+
+    def calculated(self):
+        """Return the metrics calculated so far."""
+        return frozenset(
+            metric
+            for metric, value in zip(METRIC_DEPENDENCIES, self.values)
+            if value is not _NOT_CALCULATED
+        )
+
+    def results(self):
+        """Return every metric."""
+        return CalculationResults(*map(self.get, CalculationResults._fields))
+
+
+def _humidex(inputs, lib, humidity):
+    """Calculate humidex given temperature and humidity"""
+    # It equals H = T + (0.5555 * (e - 10)), where T is the temperature in Celsius and e is the vapor pressure in millibars (mb)
+    vapor_pressure = lib.GetVapPresFromRelHum(inputs.indoor_temp, humidity) * 0.01
+    return inputs.indoor_temp + (0.5555 * (vapor_pressure - 10))
+
+
+def humidex(inputs, lib):
+    """Calculate the humidex for the indoor air."""
+    if None in (inputs.indoor_temp, inputs.indoor_hum):
+        return None
+
+    return float(f"{_humidex(inputs, lib, inputs.indoor_hum):.2f}")
+
+
+def humidex_comfort(inputs, lib, humidex_value):
+    """Describe the comfort level at a humidex."""
+    if humidex_value is None:
+        return None
+
+    return HUMIDEX_COMFORT_LEVELS[
+        bisect.bisect(HUMIDEX_COMFORT_BREAK_POINTS, humidex_value - 1)
+    ]
+
+
+def dewpoint(inputs, lib):
+    """Calculate the dewpoint for the indoor air."""
+    if None in (inputs.indoor_temp, inputs.indoor_hum):
+        return None
+
+    dewpoint_value = float(
+        f"{lib.GetTDewPointFromRelHum(inputs.indoor_temp, inputs.indoor_hum):.2f}"
+    )
+
+    _LOGGER.debug("Dewpoint: %f °C", dewpoint_value)
+    return dewpoint_value
+
+
+def specific_humidity(inputs, lib, dewpoint_value):
+    """Calculate the specific humidity in the room."""
+    if None in (dewpoint_value, inputs.pressure):
+        return None
+
+    specific_humidity_value = (
+        lib.GetSpecificHumFromHumRatio(
+            lib.GetHumRatioFromTDewPoint(dewpoint_value, inputs.pressure)
+        )
+        * 1000
+    )
+    specific_humidity_value = float(f"{specific_humidity_value:.2f}")
+
+    _LOGGER.debug(
+        "Specific humidity: %s %s",
+        specific_humidity_value,
+        MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR,
+    )
+    return specific_humidity_value
+
+
+def critical_humidity(inputs, lib, dewpoint_value):
+    """Calculate the humidity at the critical temperature."""
+    if None in (dewpoint_value, inputs.crit_temp):
+        _LOGGER.debug(
+            "Invalid inputs - dewpoint: %s °C crit_temp: %s °C",
+            dewpoint_value,
+            inputs.crit_temp,
+        )
+        return None
+
+    if dewpoint_value > inputs.crit_temp:
+        _LOGGER.debug("Dewpoint is above dry bulb temperature")
+        crit_humidity = 100
+    else:
+        crit_humidity = (
+            lib.GetRelHumFromTDewPoint(inputs.crit_temp, dewpoint_value) * 100
+        )
+
+    if crit_humidity > 100:
+        crit_humidity = 100
+    elif crit_humidity < 0:
+        crit_humidity = 0
+    else:
+        crit_humidity = float(f"{crit_humidity:.1f}")
+
+    _LOGGER.debug("Critical humidity: %s", crit_humidity)
+    return crit_humidity
+
+
+def mold_warning(inputs, lib, crit_humidity):
+    """Determine risk of mold"""
+    if None in (inputs.indoor_hum, crit_humidity):
+        return None
+
+    if inputs.indoor_hum > 0.6:
+        warning = True
+    elif crit_humidity > 60:
+        warning = True
+    else:
+        warning = False
+
+    _LOGGER.debug("Risk of mold: %s", warning)
+    return warning
+
+
+def comfortable_specific_humidity(inputs, lib):
+    """Calculate the comfortable specific humidity based on air pressure."""
+    if inputs.comfortable_specific_humidity is not None:
+        return inputs.comfortable_specific_humidity
+
+    if inputs.pressure is None:
+        return None
+
+    comfortable = _comfortable_specific_humidity(
+        round(inputs.pressure / COMFORTABLE_PRESSURE_RESOLUTION), lib
+    )
+    _LOGGER.debug(
+        "Optimal specific humidity set to %s%s",
+        comfortable,
+        MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR,
+    )
+    return comfortable
+
+
+@functools.lru_cache(maxsize=256)
+def _comfortable_specific_humidity(pressure_step, lib):
+    """Calculate the comfortable specific humidity at a multiple of the resolution.
+
+    It only changes by about 0.0007 mg_H₂O g_Air⁻¹ per 10 Pa, so the result
+    is shared by every pressure within the same step.
+    """
+    pressure = pressure_step * COMFORTABLE_PRESSURE_RESOLUTION
+    comfortable = (
+        lib.GetSpecificHumFromHumRatio(
+            lib.GetHumRatioFromRelHum(IDEAL_TEMPERATURE, IDEAL_HUMIDITY, pressure)
+        )
+        * 1000
+    )
+    return float(f"{comfortable:.2f}")
+
+
+def optimal_humidex(inputs, lib, optimal_humidity_value):
+    """Calculate the humidex at the optimal relative humidity."""
+    if None in (optimal_humidity_value, inputs.indoor_temp):
+        return None
+
+    optimal_humidex_value = float(
+        f"{_humidex(inputs, lib, optimal_humidity_value / 100):.2f}"
+    )
+    _LOGGER.debug("Optimal humidex set to %s °C", optimal_humidex_value)
+    return optimal_humidex_value
+
+
+def comfortable_humidity(inputs, lib, comfortable_specific_humidity_value, room=None):
+    """Calculate the comfortable humidity for the room."""
+    if None in (
+        inputs.indoor_temp,
+        inputs.pressure,
+        comfortable_specific_humidity_value,
+    ):
+        return None
+
+    comfortable = (
+        lib.GetRelHumFromHumRatio(
+            inputs.indoor_temp,
+            lib.GetHumRatioFromSpecificHum(comfortable_specific_humidity_value / 1000),
+            inputs.pressure,
+        )
+        * 100
+    )
+    _LOGGER.debug("Comfortable relative humidity is: %s", comfortable)
+    if comfortable > 100:
+        _WARNINGS.warning(
+            (room, ATTR_COMFORTABLE_HUMIDITY),
+            "Not possible to reach a comfortable humidity at %s°C, will feel dry.",
+            inputs.indoor_temp,
+        )
+        comfortable = 100
+
+    comfortable = float(f"{comfortable:.2f}")
+    _LOGGER.debug("Comfortable humidity is %s", comfortable)
+    return comfortable
+
+
+def optimal_humidity(
+    inputs,
+    lib,
+    comfortable_specific_humidity_value,
+    comfortable_humidity_value,
+    room=None,
+):
+    """Calculate the optimal humidity for the room."""
+    if None in (
+        inputs.indoor_temp,
+        inputs.crit_temp,
+        comfortable_specific_humidity_value,
+        comfortable_humidity_value,
+    ):
+        return None
+
+    comfortable_dew_point = lib.GetTDewPointFromRelHum(
+        inputs.indoor_temp, comfortable_humidity_value / 100
+    )
+
+    _LOGGER.debug("Comfortable dewpoint is %s", comfortable_dew_point)
+
+    if comfortable_dew_point > inputs.crit_temp:
+        _LOGGER.debug("Comfortable dewpoint is above critical dry bulb temperature")
+        crit_humidity = 1
+    else:
+        crit_humidity = lib.GetRelHumFromTDewPoint(
+            inputs.crit_temp, comfortable_dew_point
+        )
+
+    _LOGGER.debug("Critical humidity is %s", crit_humidity)
+
+    if crit_humidity > 0.6:
+        # given condensation + mold forms at or above 60% RH at the crit_temp; get dew point
+        dew_point = lib.GetTDewPointFromRelHum(inputs.crit_temp, 0.6)
+        if dew_point > inputs.indoor_temp:
+            _WARNINGS.warning(
+                (room, ATTR_OPTIMAL_HUMIDITY),
+                "Not possible to reach a mold free humidity at %s°C given a critical temperature of %s°C and humidity of %s%%",
+                inputs.indoor_temp,
+                inputs.crit_temp,
+                crit_humidity * 100,
+            )
+            return None
+
+        optimal = lib.GetRelHumFromTDewPoint(inputs.indoor_temp, dew_point) * 100
+    else:
+        optimal = comfortable_humidity_value
+
+    if optimal > 60:
+        optimal = 60
+    elif optimal < 0:
+        optimal = 0
+    else:
+        optimal = float(f"{optimal:.1f}")
+
+    _LOGGER.debug("Optimal humidity: %s %%", optimal)
+    return optimal
+
+
+# Indexes of the metrics to calculate again when an input changes.
+_AFFECTED_METRICS = {
+    field: _affected_metrics(field) for field in CalculationInputs._fields
+}
+# The math engine is used by every metric.
+_AFFECTED_METRICS["math_engine"] = tuple(range(len(METRIC_DEPENDENCIES)))
+
+# Metrics whose calculation warns when they can not be reached, which take
+# the room as well.
+_WARNING_METRICS = frozenset((ATTR_COMFORTABLE_HUMIDITY, ATTR_OPTIMAL_HUMIDITY))
+
+# Function calculating every metric.
+CALCULATORS = {
+    ATTR_DEWPOINT: dewpoint,
+    ATTR_SPECIFIC_HUMIDITY: specific_humidity,
+    ATTR_OPTIMAL_HUMIDITY: optimal_humidity,
+    ATTR_CRITICAL_HUMIDITY: critical_humidity,
+    ATTR_MOLD_WARNING: mold_warning,
+    ATTR_HUMIDEX: humidex,
+    ATTR_HUMIDEX_COMFORT: humidex_comfort,
+    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY: comfortable_specific_humidity,
+    ATTR_OPTIMAL_HUMIDEX: optimal_humidex,
+    ATTR_COMFORTABLE_HUMIDITY: comfortable_humidity,
+}
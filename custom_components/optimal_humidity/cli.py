@@ -0,0 +1,287 @@
+"""Recalculate metrics over exported history, without Home Assistant.
+
+Reads a CSV or Parquet file with a row per point in time, calculates the
+requested metrics for every row with the batch module and writes the input
+columns with the metrics appended. Rows are processed in chunks, so memory
+use does not depend on the size of the file.
+
+Usage: python -m custom_components.optimal_humidity.cli INPUT OUTPUT [options]
+
+Parquet files require pyarrow, which is not a requirement of the integration.
+"""
+
+import argparse
+import csv
+import math
+import sys
+
+import numpy as np
+
+from . import batch, psychrometrics
+from .const import (
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_HUMIDEX_COMFORT,
+    ATTR_MOLD_WARNING,
+    ATTR_OPTIMAL_HUMIDITY,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+)
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_METRICS = (ATTR_OPTIMAL_HUMIDITY, ATTR_CRITICAL_HUMIDITY, ATTR_MOLD_WARNING)
+
+PRESSURE_UNITS = {"hPa": 100, "Pa": 1}
+
+
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _parse_float(value):
+    """Parse a value, returning NaN for states like unknown or unavailable."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _column(chunk, name):
+    """Return a column of a chunk as an array of floats."""
+    try:
+        values = chunk[name]
+    except KeyError:
+        raise SystemExit(f"Column {name} is not in the input") from None
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiu":
+        return values.astype(np.float64)
+    return np.fromiter(map(_parse_float, values), np.float64, len(values))
+
+
+def _read_csv(path, chunk_size):
+    """Yield chunks of a CSV file as dictionaries of columns."""
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        while True:
+            rows = [row for _, row in zip(range(chunk_size), reader)]
+            if not rows:
+                return
+            yield dict(zip(header, zip(*rows)))
+
+
+def _read_parquet(path, chunk_size):
+    """Yield chunks of a Parquet file as dictionaries of columns."""
+    import pyarrow.parquet as pq
+
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield {
+            name: column.to_numpy(zero_copy_only=False)
+            for name, column in zip(record_batch.schema.names, record_batch.columns)
+        }
+
+
+class _CsvWriter:
+    """Writes chunks of columns to a CSV file."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._header = None
+
+    def write(self, columns):
+        if self._header is None:
+            self._header = list(columns)
+            self._writer.writerow(self._header)
+        self._writer.writerows(zip(*(columns[name] for name in self._header)))
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Writes chunks of columns to a Parquet file."""
+
+    def __init__(self, path, metrics):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self._path = path
+        self._writer = None
+        # Metrics can be unavailable for a whole chunk, so their types are fixed.
+        self._types = {metric: pa.float64() for metric in metrics}
+        if ATTR_MOLD_WARNING in metrics:
+            self._types[ATTR_MOLD_WARNING] = pa.bool_()
+        if ATTR_HUMIDEX_COMFORT in metrics:
+            self._types[ATTR_HUMIDEX_COMFORT] = pa.string()
+
+    def write(self, columns):
+        table = self._pa.table(
+            {
+                name: self._pa.array(values, type=self._types.get(name))
+                for name, values in columns.items()
+            }
+        )
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _output_values(results, metric):
+    """Return a metric as a list, with None where the sensor is unavailable."""
+    values = results[metric]
+    if metric == ATTR_HUMIDEX_COMFORT:
+        return [value or None for value in values.tolist()]
+    if metric == ATTR_MOLD_WARNING:
+        return [None if math.isnan(value) else value == 1 for value in values.tolist()]
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+def recalculate(
+    chunks,
+    temperature_column,
+    humidity_column,
+    critical_temperature_columns,
+    pressure_column=None,
+    pressure=None,
+    pressure_unit="hPa",
+    fahrenheit=False,
+    comfortable_specific_humidity=None,
+    math_engine=MATH_ENGINE_PSYCHROLIB,
+    metrics=DEFAULT_METRICS,
+):
+    """Yield chunks of columns with the metrics calculated for every row.
+
+    Humidity is in %RH like the humidity sensors. The critical temperature
+    is the lowest of the critical_temperature_columns. Pressure is taken from
+    pressure_column in pressure_unit, falling back to pressure in Pa for
+    missing values.
+    """
+    for chunk in chunks:
+        indoor_temp = _column(chunk, temperature_column)
+        crit_temp = np.fmin.reduce(
+            [_column(chunk, column) for column in critical_temperature_columns]
+        )
+        if fahrenheit:
+            indoor_temp = (indoor_temp - 32) / 1.8
+            crit_temp = (crit_temp - 32) / 1.8
+        indoor_hum = _column(chunk, humidity_column) / 100
+
+        chunk_pressure = np.float64(pressure)
+        if pressure_column is not None:
+            chunk_pressure = (
+                _column(chunk, pressure_column) * PRESSURE_UNITS[pressure_unit]
+            )
+            chunk_pressure = np.where(
+                np.isnan(chunk_pressure), pressure, chunk_pressure
+            )
+
+        results = batch.calculate(
+            indoor_temp,
+            indoor_hum,
+            crit_temp,
+            chunk_pressure,
+            comfortable_specific_humidity,
+            math_engine,
+        )
+        yield {
+            **chunk,
+            **{metric: _output_values(results, metric) for metric in metrics},
+        }
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.optimal_humidity.cli",
+        description=__doc__.splitlines()[0],
+    )
+    parser.add_argument("input", help="CSV or Parquet file with the history")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument(
+        "--temperature-column", default="indoor_temp", help="indoor temperature"
+    )
+    parser.add_argument(
+        "--humidity-column", default="indoor_humidity", help="indoor humidity in %%RH"
+    )
+    parser.add_argument(
+        "--critical-temperature-column",
+        nargs="+",
+        default=["critical_temp"],
+        help="critical temperature, the lowest is used when there are several",
+    )
+    parser.add_argument("--pressure-column", help="indoor pressure, optional")
+    parser.add_argument("--pressure-unit", choices=tuple(PRESSURE_UNITS), default="hPa")
+    parser.add_argument(
+        "--elevation",
+        type=float,
+        default=0,
+        help="elevation in m for the standard pressure used without pressure",
+    )
+    parser.add_argument(
+        "--fahrenheit",
+        action="store_true",
+        help="temperatures are in °F, calculated temperatures are still in °C",
+    )
+    parser.add_argument(
+        "--comfortable-specific-humidity",
+        type=float,
+        help="override in mg_H₂O g_Air⁻¹",
+    )
+    parser.add_argument(
+        "--math-engine",
+        choices=(MATH_ENGINE_PSYCHROLIB, MATH_ENGINE_FAST),
+        default=MATH_ENGINE_PSYCHROLIB,
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=batch.RESULT_DTYPE.names,
+        default=DEFAULT_METRICS,
+        help="metrics to add, by default %(default)s",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Recalculate the metrics of a history file."""
+    args = _parse_args(argv)
+
+    pressure = psychrometrics.GetStandardAtmPressure(args.elevation)
+
+    if _is_parquet(args.input):
+        chunks = _read_parquet(args.input, args.chunk_size)
+    else:
+        chunks = _read_csv(args.input, args.chunk_size)
+    if _is_parquet(args.output):
+        writer = _ParquetWriter(args.output, args.metrics)
+    else:
+        writer = _CsvWriter(args.output)
+
+    try:
+        for chunk in recalculate(
+            chunks,
+            args.temperature_column,
+            args.humidity_column,
+            args.critical_temperature_column,
+            args.pressure_column,
+            pressure,
+            args.pressure_unit,
+            args.fahrenheit,
+            args.comfortable_specific_humidity,
+            args.math_engine,
+            args.metrics,
+        ):
+            writer.write(chunk)
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
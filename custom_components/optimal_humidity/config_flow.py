@@ -0,0 +1,169 @@
+"""Adds rooms of sensors from the UI, with a sensor per monitored metric."""
+
+import voluptuous as vol
+
+from .const import (
+    ATTR_OPTIMAL_HUMIDITY,
+    CONF_CRITICAL_TEMP,
+    CONF_INDOOR_HUMIDITY,
+    CONF_INDOOR_PRESSURE,
+    CONF_INDOOR_TEMP,
+    CONF_MATH_ENGINE,
+    CONF_MIN_UPDATE_INTERVAL,
+    DEFAULT_NAME,
+    DOMAIN,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+    METRICS,
+)
+
+from homeassistant import config_entries
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import CONF_MONITORED_CONDITIONS, CONF_NAME, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers import selector
+
+
+def _options_schema(options):
+    """Return the schema of the options of a room, defaulting to options."""
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_INDOOR_TEMP, default=options.get(CONF_INDOOR_TEMP, vol.UNDEFINED)
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain=SENSOR_DOMAIN, device_class=SensorDeviceClass.TEMPERATURE
+                )
+            ),
+            vol.Required(
+                CONF_CRITICAL_TEMP,
+                default=options.get(CONF_CRITICAL_TEMP, vol.UNDEFINED),
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain=[SENSOR_DOMAIN, "group"], multiple=True
+                )
+            ),
+            vol.Required(
+                CONF_INDOOR_HUMIDITY,
+                default=options.get(CONF_INDOOR_HUMIDITY, vol.UNDEFINED),
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain=SENSOR_DOMAIN, device_class=SensorDeviceClass.HUMIDITY
+                )
+            ),
+            # A suggested value rather than a default, so it can be cleared.
+            vol.Optional(
+                CONF_INDOOR_PRESSURE,
+                description={"suggested_value": options.get(CONF_INDOOR_PRESSURE)},
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain=SENSOR_DOMAIN,
+                    device_class=[
+                        SensorDeviceClass.PRESSURE,
+                        SensorDeviceClass.ATMOSPHERIC_PRESSURE,
+                    ],
+                )
+            ),
+            vol.Required(
+                CONF_MONITORED_CONDITIONS,
+                default=options.get(CONF_MONITORED_CONDITIONS, [ATTR_OPTIMAL_HUMIDITY]),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=list(METRICS),
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.LIST,
+                )
+            ),
+            vol.Required(
+                CONF_MATH_ENGINE,
+                default=options.get(CONF_MATH_ENGINE, MATH_ENGINE_PSYCHROLIB),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[MATH_ENGINE_PSYCHROLIB, MATH_ENGINE_FAST]
+                )
+            ),
+            vol.Required(
+                CONF_MIN_UPDATE_INTERVAL,
+                default=options.get(CONF_MIN_UPDATE_INTERVAL, 0),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0,
+                    mode=selector.NumberSelectorMode.BOX,
+                    unit_of_measurement=UnitOfTime.SECONDS,
+                )
+            ),
+        }
+    )
+
+
+def _validate_options(user_input):
+    """Return the errors of the options of a room."""
+    if not user_input[CONF_MONITORED_CONDITIONS]:
+        return {CONF_MONITORED_CONDITIONS: "no_monitored_conditions"}
+    return {}
+
+
+class OptimalHumidityConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Adds a room of sensors.
+
+    The name of the room is the title of its entry, and everything else its
+    options, so all of them can be changed later.
+    """
+
+    VERSION = 1
+
+    async def async_step_user(self, user_input=None):
+        """Ask for the name, input sensors and metrics of a room."""
+        errors = {}
+        if user_input is not None:
+            errors = _validate_options(user_input)
+            if not errors:
+                options = dict(user_input)
+                title = options.pop(CONF_NAME)
+                return self.async_create_entry(title=title, data={}, options=options)
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_NAME,
+                        default=(user_input or {}).get(CONF_NAME, DEFAULT_NAME),
+                    ): selector.TextSelector(),
+                    **_options_schema(user_input or {}).schema,
+                }
+            ),
+            errors=errors,
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the flow that changes the options of a room."""
+        return OptimalHumidityOptionsFlow(config_entry)
+
+
+class OptimalHumidityOptionsFlow(config_entries.OptionsFlow):
+    """Changes the input sensors and metrics of a room.
+
+    The room is reloaded with the new options once they are saved.
+    """
+
+    def __init__(self, config_entry):
+        """Initialize the flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Ask for the input sensors and metrics of the room."""
+        errors = {}
+        if user_input is not None:
+            errors = _validate_options(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=_options_schema(user_input or self.config_entry.options),
+            errors=errors,
+        )
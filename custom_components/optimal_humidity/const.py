@@ -1,46 +1,144 @@
 """Constants for optimal_humidity."""
 
-from homeassistant.components.sensor import SensorDeviceClass
-
-from homeassistant.const import (
-    PERCENTAGE,
-    UnitOfTemperature,
-)
-
 NAME = "Optimal Humidity"
 DOMAIN = "optimal_humidity"
 DOMAIN_DATA = f"{DOMAIN}_data"
+DOMAIN_PENDING = f"{DOMAIN}_pending"
+DOMAIN_WARNINGS = f"{DOMAIN}_warnings"
 VERSION = "v2.0.11"
 ISSUE_URL = "https://github.com/TheRealWaldo/ha-optimal-humidity/issues"
 
+PLATFORMS = ["sensor"]
+
 ATTR_DEWPOINT = "dewpoint"
 ATTR_SPECIFIC_HUMIDITY = "specific_humidity"
 ATTR_OPTIMAL_HUMIDITY = "optimal_humidity"
 ATTR_COMFORTABLE_SPECIFIC_HUMIDITY = "comfortable_specific_humidity"
 ATTR_CRITICAL_HUMIDITY = "critical_humidity"
 ATTR_MOLD_WARNING = "mold_warning"
+ATTR_MOLD_INDEX = "mold_index"
 ATTR_HUMIDEX = "humidex"
 ATTR_HUMIDEX_COMFORT = "humidex_comfort"
 ATTR_OPTIMAL_HUMIDEX = "optimal_humidex"
 ATTR_COMFORTABLE_HUMIDITY = "comfortable_humidity"
+ATTR_DIAGNOSTICS = "diagnostics"
+ATTR_CRITICAL_TEMP_SENSOR = "critical_temp_sensor"
+ATTR_INPUT_FAULT = "input_fault"
 
 CONF_CRITICAL_TEMP = "critical_temp_sensor"
 CONF_INDOOR_HUMIDITY = "indoor_humidity_sensor"
 CONF_INDOOR_TEMP = "indoor_temp_sensor"
 CONF_INDOOR_PRESSURE = "indoor_pressure_sensor"
 CONF_COMFORTABLE_SPECIFIC_HUMIDITY = "comfortable_specific_humidity"
+CONF_MATH_ENGINE = "math_engine"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
+CONF_DEADBAND = "deadband"
+CONF_RELATIVE_DEADBAND = "relative_deadband"
+CONF_CACHE_SIZE = "cache_size"
+CONF_DIAGNOSTICS = "diagnostics"
+CONF_SMOOTHING = "smoothing"
+CONF_FILTER = "filter"
+CONF_ALPHA = "alpha"
+CONF_WINDOW = "window"
+CONF_PROCESS_NOISE = "process_noise"
+CONF_MEASUREMENT_NOISE = "measurement_noise"
+
+MATH_ENGINE_PSYCHROLIB = "psychrolib"
+MATH_ENGINE_FAST = "fast"
+
+# What is wrong with the state of an input sensor, for the input_fault attribute.
+FAULT_NOT_NUMERIC = "not_numeric"
+FAULT_UNSUPPORTED_UNIT = "unsupported_unit"
+FAULT_OUT_OF_RANGE = "out_of_range"
+# Faults that need the input sensor fixed, which are raised as repairs issues
+# because the sensors they make unavailable have no attributes.
+REPAIR_FAULTS = (FAULT_NOT_NUMERIC, FAULT_UNSUPPORTED_UNIT, FAULT_OUT_OF_RANGE)
+
+FILTER_EMA = "ema"
+FILTER_MEDIAN = "median"
+FILTER_KALMAN = "kalman"
+
+DEFAULT_CACHE_SIZE = 0
+DEFAULT_ALPHA = 0.3
+DEFAULT_WINDOW = 5
+DEFAULT_PROCESS_NOISE = 0.01
+DEFAULT_MEASUREMENT_NOISE = 1.0
+
+# Resolution inputs are quantized to when results are cached.
+CACHE_TEMPERATURE_RESOLUTION = 0.01
+CACHE_HUMIDITY_RESOLUTION = 0.0001
+CACHE_PRESSURE_RESOLUTION = 1
+
+# Resolution of the pressure the comfortable specific humidity is calculated at.
+COMFORTABLE_PRESSURE_RESOLUTION = 10
+
+# Compute durations kept for the percentile in diagnostics.
+DIAGNOSTICS_SAMPLES = 100
+
+# Seconds a repeated warning is only counted after it was logged.
+WARNING_SUMMARY_INTERVAL = 600
+
+# Seconds between checks for warning summaries that are due.
+WARNING_FLUSH_INTERVAL = 60
 
 IDEAL_HUMIDITY = 0.45
 IDEAL_TEMPERATURE = 21
 
 DEFAULT_NAME = "Optimal Humidity"
 
+HUMIDEX_COMFORT_BREAK_POINTS = (29, 34, 39, 45, 54, 10000)
+HUMIDEX_COMFORT_LEVELS = (
+    "Little or no discomfort",
+    "Noticeable discomfort",
+    "Evident discomfort",
+    "Intense discomfort; avoid exertion",
+    "Dangerous discomfort",
+    "Heat stroke probable",
+)
+
 MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR = "mg_H₂O g_Air⁻¹"
+
+# Metrics each metric needs calculated first, used to only evaluate the
+# part of the calculation chain a sensor actually publishes.
+METRIC_DEPENDENCIES = {
+    ATTR_DEWPOINT: (),
+    ATTR_SPECIFIC_HUMIDITY: (ATTR_DEWPOINT,),
+    ATTR_OPTIMAL_HUMIDITY: (
+        ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,
+        ATTR_COMFORTABLE_HUMIDITY,
+    ),
+    ATTR_CRITICAL_HUMIDITY: (ATTR_DEWPOINT,),
+    ATTR_MOLD_WARNING: (ATTR_CRITICAL_HUMIDITY,),
+    ATTR_HUMIDEX: (),
+    ATTR_HUMIDEX_COMFORT: (ATTR_HUMIDEX,),
+    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY: (),
+    ATTR_OPTIMAL_HUMIDEX: (ATTR_OPTIMAL_HUMIDITY,),
+    ATTR_COMFORTABLE_HUMIDITY: (ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,),
+}
+
+# Inputs of the calculation every metric uses, besides the metrics it depends on.
+METRIC_INPUTS = {
+    ATTR_DEWPOINT: ("indoor_temp", "indoor_hum"),
+    ATTR_SPECIFIC_HUMIDITY: ("pressure",),
+    ATTR_OPTIMAL_HUMIDITY: ("indoor_temp", "crit_temp"),
+    ATTR_CRITICAL_HUMIDITY: ("crit_temp",),
+    ATTR_MOLD_WARNING: ("indoor_hum",),
+    ATTR_HUMIDEX: ("indoor_temp", "indoor_hum"),
+    ATTR_HUMIDEX_COMFORT: (),
+    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY: ("comfortable_specific_humidity", "pressure"),
+    ATTR_OPTIMAL_HUMIDEX: ("indoor_temp",),
+    ATTR_COMFORTABLE_HUMIDITY: ("indoor_temp", "pressure"),
+}
+
+# Name, unit, device class and icon of the sensor of every metric. Units and device
+# classes are the values of the Home Assistant constants, so this module does
+# not need Home Assistant.
 SENSOR_TYPES = {
     ATTR_DEWPOINT: (
         ATTR_DEWPOINT,
-        UnitOfTemperature.CELSIUS,
-        SensorDeviceClass.TEMPERATURE,
+        "°C",
+        "temperature",
         "hass:thermometer",
     ),
     ATTR_SPECIFIC_HUMIDITY: (
@@ -51,22 +149,34 @@ SENSOR_TYPES = {
     ),
     ATTR_OPTIMAL_HUMIDITY: (
         ATTR_OPTIMAL_HUMIDITY,
-        PERCENTAGE,
-        SensorDeviceClass.HUMIDITY,
+        "%",
+        "humidity",
         "mdi:water-percent",
     ),
     ATTR_CRITICAL_HUMIDITY: (
         ATTR_CRITICAL_HUMIDITY,
-        PERCENTAGE,
-        SensorDeviceClass.HUMIDITY,
+        "%",
+        "humidity",
         "mdi:water-percent",
     ),
     ATTR_HUMIDEX: (
         ATTR_HUMIDEX,
-        UnitOfTemperature.CELSIUS,
-        SensorDeviceClass.TEMPERATURE,
+        "°C",
+        "temperature",
         "hass:thermometer",
     ),
+    ATTR_MOLD_WARNING: (
+        ATTR_MOLD_WARNING,
+        None,
+        None,
+        "mdi:alert",
+    ),
+    ATTR_MOLD_INDEX: (
+        ATTR_MOLD_INDEX,
+        None,
+        None,
+        "mdi:mushroom",
+    ),
     ATTR_HUMIDEX_COMFORT: (
         ATTR_HUMIDEX_COMFORT,
         None,
@@ -81,16 +191,31 @@ SENSOR_TYPES = {
     ),
     ATTR_OPTIMAL_HUMIDEX: (
         ATTR_OPTIMAL_HUMIDEX,
-        UnitOfTemperature.CELSIUS,
-        SensorDeviceClass.TEMPERATURE,
+        "°C",
+        "temperature",
         "hass:thermometer",
     ),
     ATTR_COMFORTABLE_HUMIDITY: (
         ATTR_COMFORTABLE_HUMIDITY,
-        PERCENTAGE,
-        SensorDeviceClass.HUMIDITY,
+        "%",
+        "humidity",
         "mdi:water-percent",
     ),
 }
 
+# Metrics in the order they are offered in.
+METRICS = (
+    ATTR_DEWPOINT,
+    ATTR_SPECIFIC_HUMIDITY,
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_OPTIMAL_HUMIDITY,
+    ATTR_MOLD_WARNING,
+    ATTR_MOLD_INDEX,
+    ATTR_HUMIDEX,
+    ATTR_HUMIDEX_COMFORT,
+    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,
+    ATTR_OPTIMAL_HUMIDEX,
+    ATTR_COMFORTABLE_HUMIDITY,
+)
+
 DEFAULT_NAME = NAME
@@ -0,0 +1,958 @@
+"""Shared calculation engine for sensors that use the same input entities."""
+
+import asyncio
+import functools
+import logging
+import time
+from collections.abc import Mapping
+from datetime import timedelta
+
+from . import psychrometrics
+from .cache import quantize
+from .calculation import Calculation, CalculationInputs
+from .aggregator import WarningAggregator, flush_warnings
+from .filters import create_filter
+from .heap import IndexedMinHeap
+from .mold import MoldGrowthIndex
+from .const import (
+    ATTR_CRITICAL_HUMIDITY,
+    ATTR_MOLD_INDEX,
+    CONF_CRITICAL_TEMP,
+    CONF_INDOOR_HUMIDITY,
+    CONF_INDOOR_PRESSURE,
+    CONF_INDOOR_TEMP,
+    DOMAIN,
+    DOMAIN_DATA,
+    DOMAIN_PENDING,
+    DOMAIN_WARNINGS,
+    FAULT_NOT_NUMERIC,
+    FAULT_OUT_OF_RANGE,
+    FAULT_UNSUPPORTED_UNIT,
+    METRIC_DEPENDENCIES,
+    REPAIR_FAULTS,
+    WARNING_FLUSH_INTERVAL,
+    CACHE_TEMPERATURE_RESOLUTION,
+    CACHE_HUMIDITY_RESOLUTION,
+    CACHE_PRESSURE_RESOLUTION,
+)
+
+from homeassistant import util
+from homeassistant.util.unit_conversion import TemperatureConverter
+
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    ATTR_UNIT_OF_MEASUREMENT,
+    EVENT_HOMEASSISTANT_START,
+    PERCENTAGE,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    UnitOfPressure,
+    UnitOfTemperature,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.helpers.issue_registry import (
+    IssueSeverity,
+    async_create_issue,
+    async_delete_issue,
+)
+
+_LOGGER = logging.getLogger(__name__)
+# Warnings about input sensors, by entity and what is wrong with its state.
+_WARNINGS = WarningAggregator(_LOGGER)
+
+_NOTHING_RESTORED = frozenset()
+_UNCHANGED = object()
+
+# Smallest change of a smoothed input that is calculated with, the same as
+# inputs are quantized to for the cache.
+_INPUT_RESOLUTIONS = {
+    CONF_INDOOR_TEMP: CACHE_TEMPERATURE_RESOLUTION,
+    CONF_CRITICAL_TEMP: CACHE_TEMPERATURE_RESOLUTION,
+    CONF_INDOOR_HUMIDITY: CACHE_HUMIDITY_RESOLUTION,
+    CONF_INDOOR_PRESSURE: CACHE_PRESSURE_RESOLUTION,
+}
+
+
+@callback
+def async_get_engine(
+    hass,
+    indoor_temp_sensor,
+    critical_temp_sensors,
+    indoor_humidity_sensor,
+    indoor_pressure_sensor,
+    comfortable_specific_humidity,
+    math_engine,
+    coalesce_window,
+    min_update_interval,
+    smoothing,
+    cache,
+):
+    """Return the engine for a set of inputs, creating it if needed.
+
+    critical_temp_sensors is a tuple of the entities the coldest of which is
+    the critical temperature. smoothing maps the configuration keys of inputs
+    to the configuration of the filter to smooth them with. An existing
+    engine keeps the cache it was created with.
+    """
+    engines = hass.data.get(DOMAIN_DATA)
+    if engines is None:
+        engines = hass.data[DOMAIN_DATA] = {}
+        if not hass.is_running:
+            hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_START,
+                functools.partial(_async_start_engines, hass),
+            )
+
+    key = (
+        indoor_temp_sensor,
+        critical_temp_sensors,
+        indoor_humidity_sensor,
+        indoor_pressure_sensor,
+        comfortable_specific_humidity,
+        math_engine,
+        coalesce_window,
+        min_update_interval,
+        tuple((name, tuple(config.items())) for name, config in smoothing.items()),
+    )
+
+    engine = engines.get(key)
+    if engine is None:
+        engine = OptimalHumidityEngine(
+            hass,
+            key,
+            indoor_temp_sensor,
+            critical_temp_sensors,
+            indoor_humidity_sensor,
+            indoor_pressure_sensor,
+            comfortable_specific_humidity,
+            math_engine,
+            coalesce_window,
+            min_update_interval,
+            smoothing,
+            cache,
+        )
+        if not engines:
+            hass.data[DOMAIN_WARNINGS] = async_track_time_interval(
+                hass, _async_flush_warnings, timedelta(seconds=WARNING_FLUSH_INTERVAL)
+            )
+        engines[key] = engine
+
+    return engine
+
+
+@callback
+def _async_start_engines(hass, _event):
+    """Start every engine in a single pass once Home Assistant has started.
+
+    Every engine is seeded with the states of its inputs before any of them
+    calculates, and every engine is updated before any sensor is notified.
+    Sensors of engines without a state for every input are notified too, so
+    they no longer show the state restored from before the restart. An
+    engine that fails is logged and made unavailable without holding up the
+    others.
+    """
+    engines = [
+        engine
+        for engine in hass.data.get(DOMAIN_DATA, {}).values()
+        if not engine.started
+    ]
+    _LOGGER.debug("Starting %s engines", len(engines))
+    seeded = {engine: engine.async_seed() for engine in engines}
+    _update_engines([engine for engine, has_inputs in seeded.items() if has_inputs])
+    _async_notify_engines(engines)
+
+
+@callback
+def _async_flush_warnings(_now):
+    """Log the warning summaries that are due while engines are running."""
+    flush_warnings()
+
+
+@callback
+def _async_schedule_pending(hass, engine):
+    """Recalculate an engine at the end of the current loop iteration.
+
+    Inputs changed in the same iteration, such as every sensor of a device
+    updated at once or a pressure sensor shared by every room, are
+    recalculated together, once per engine.
+    """
+    pending = hass.data.get(DOMAIN_PENDING)
+    if pending is None:
+        pending = hass.data[DOMAIN_PENDING] = {}
+        hass.async_create_task(_async_recalculate_pending(hass))
+    pending[engine] = None
+
+
+async def _async_recalculate_pending(hass):
+    """Recalculate every pending engine, then notify all of their sensors.
+
+    Every engine is updated before any sensor writes its state, so the
+    states of all of them are written in a single pass. An engine that
+    fails is logged and made unavailable without holding up the others.
+    """
+    # Yield once, so changes later in this iteration join the batch even when
+    # the task is started eagerly.
+    await asyncio.sleep(0)
+    engines = [engine for engine in hass.data.pop(DOMAIN_PENDING) if engine.started]
+    _update_engines(engines)
+    _async_notify_engines(engines)
+
+
+def _update_engines(engines):
+    """Recalculate engines, making those that fail unavailable."""
+    for engine in engines:
+        try:
+            engine.update()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error recalculating %s", engine.key)
+            engine.set_unavailable()
+
+
+@callback
+def _async_notify_engines(engines):
+    """Notify the sensors of engines, logging engines that fail."""
+    for engine in engines:
+        try:
+            engine.async_notify()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error notifying the sensors of %s", engine.key)
+
+
+@functools.lru_cache(maxsize=1)
+def _standard_pressure(elevation):
+    """Return the standard pressure at an elevation, shared by every engine."""
+    pressure = psychrometrics.GetStandardAtmPressure(elevation)
+    _LOGGER.debug("Pressure at current elevation of %s m is %s Pa", elevation, pressure)
+    return pressure
+
+
+class OptimalHumidityEngine:
+    """Calculates the optimal humidity chain once for all subscribed sensors.
+
+    There is an engine per room, so its state is kept in slots.
+    """
+
+    __slots__ = (
+        "hass",
+        "_key",
+        "_indoor_temp_sensor",
+        "_indoor_humidity_sensor",
+        "_critical_temp_sensor_config",
+        "critical_temp_sensors",
+        "_critical_temp_entities",
+        "_critical_temp_groups",
+        "_indoor_pressure_sensor",
+        "_coalesce_window",
+        "_min_update_interval",
+        "_last_recalculate",
+        "cache",
+        "_subscribers",
+        "_mold_subscribers",
+        "_unsub_state",
+        "_unsub_recalculate",
+        "started",
+        "last_input",
+        "last_update_duration",
+        "input_faults",
+        "restored",
+        "_indoor_temp",
+        "_indoor_hum",
+        "_crit_temp",
+        "_crit_temps",
+        "critical_temp_sensor",
+        "_indoor_pressure",
+        "_comfortable_specific_humidity",
+        "_math_engine",
+        "_smoothing",
+        "_filters",
+        "_smoothed",
+        "_calculation",
+        "mold_growth",
+        "_mold_conditions",
+        "_last_mold_update",
+        "results",
+    )
+
+    def __init__(
+        self,
+        hass,
+        key,
+        indoor_temp_sensor,
+        critical_temp_sensors,
+        indoor_humidity_sensor,
+        indoor_pressure_sensor,
+        comfortable_specific_humidity,
+        math_engine,
+        coalesce_window,
+        min_update_interval,
+        smoothing,
+        cache,
+    ):
+        """Initialize the engine."""
+        self.hass = hass
+        self._key = key
+        self._indoor_temp_sensor = indoor_temp_sensor
+        self._indoor_humidity_sensor = indoor_humidity_sensor
+        self._critical_temp_sensor_config = critical_temp_sensors
+        self.critical_temp_sensors = critical_temp_sensors
+        # For membership checks with every state change.
+        self._critical_temp_entities = frozenset(critical_temp_sensors)
+        self._critical_temp_groups = frozenset()
+        self._indoor_pressure_sensor = indoor_pressure_sensor
+        self._coalesce_window = coalesce_window.total_seconds()
+        self._min_update_interval = min_update_interval.total_seconds()
+        self._last_recalculate = None
+        self.cache = cache
+
+        self._indoor_pressure = _standard_pressure(hass.config.elevation)
+        if cache is not None:
+            self._indoor_pressure = quantize(
+                self._indoor_pressure, CACHE_PRESSURE_RESOLUTION
+            )
+
+        self._subscribers = {}
+        self._mold_subscribers = set()
+        self._unsub_state = None
+        self._unsub_recalculate = None
+        self.started = False
+
+        self.last_input = None
+        self.last_update_duration = None
+        self.input_faults = {}
+        self.restored = _NOTHING_RESTORED
+
+        self._indoor_temp = None
+        self._indoor_hum = None
+        self._crit_temp = None
+        self._crit_temps = IndexedMinHeap()
+        self.critical_temp_sensor = None
+        self._comfortable_specific_humidity = comfortable_specific_humidity
+        self._math_engine = math_engine
+        self._smoothing = smoothing
+        self._filters = {}
+        self._smoothed = {}
+
+        # Without inputs every metric is None, which later updates start from.
+        self.set_unavailable()
+        self.mold_growth = None
+        self._mold_conditions = None
+        self._last_mold_update = None
+        self.results = EngineResults(self)
+
+    @property
+    def key(self):
+        """Return the inputs the engine is shared by."""
+        return self._key
+
+    @callback
+    def async_subscribe(self, entity, metric, all_metrics=False):
+        """Subscribe an entity to calculation results for a metric.
+
+        all_metrics is whether the entity publishes every metric as its
+        attributes. Engines are started together once Home Assistant has
+        started, or right away when it already has.
+        """
+        self._subscribers[entity] = metric
+        if all_metrics or metric == ATTR_MOLD_INDEX:
+            self._mold_subscribers.add(entity)
+
+        if self.started:
+            entity.async_handle_engine_update()
+        elif self.hass.is_running:
+            if self.async_seed():
+                self.async_recalculate()
+            else:
+                self.async_notify()
+
+    @callback
+    def async_unsubscribe(self, entity):
+        """Unsubscribe an entity, shutting down without subscribers."""
+        self._subscribers.pop(entity, None)
+        self._mold_subscribers.discard(entity)
+        if not self._mold_subscribers:
+            # Growth resumes from the next update once published again.
+            self._mold_conditions = None
+        if not self._subscribers:
+            self._async_shutdown()
+
+    @callback
+    def _async_shutdown(self):
+        """Release listeners once the last subscriber is gone."""
+        _LOGGER.debug("Shutting down engine for %s", self._key)
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        if self._unsub_recalculate is not None:
+            self._unsub_recalculate()
+            self._unsub_recalculate = None
+        engines = self.hass.data.get(DOMAIN_DATA, {})
+        engines.pop(self._key, None)
+        if not engines:
+            unsub_warnings = self.hass.data.pop(DOMAIN_WARNINGS, None)
+            if unsub_warnings is not None:
+                unsub_warnings()
+        for entity in list(self.input_faults):
+            self._forget_fault(entity)
+        self.started = False
+
+    @callback
+    def async_seed(self):
+        """Add listeners and read the states of the inputs.
+
+        Returns whether every input has a state to calculate with.
+        """
+        _LOGGER.debug("Startup for engine %s", self._key)
+        self.started = True
+
+        self._expand_critical_temp_sensors()
+        self._async_track_inputs()
+
+        indoor_temp = self.hass.states.get(self._indoor_temp_sensor)
+        indoor_hum = self.hass.states.get(self._indoor_humidity_sensor)
+        if self._indoor_pressure_sensor is not None:
+            indoor_pressure = self.hass.states.get(self._indoor_pressure_sensor)
+
+        schedule_update = self._update_sensor(
+            self._indoor_temp_sensor, None, indoor_temp
+        )
+
+        # Probes without a state are left out of the critical temperature.
+        crit_temp_updated = False
+        for critical_temp_sensor in self.critical_temp_sensors:
+            crit_temp = self.hass.states.get(critical_temp_sensor)
+            if self._update_sensor(critical_temp_sensor, None, crit_temp):
+                crit_temp_updated = True
+        schedule_update = False if not crit_temp_updated else schedule_update
+
+        schedule_update = (
+            False
+            if not self._update_sensor(self._indoor_humidity_sensor, None, indoor_hum)
+            else schedule_update
+        )
+
+        if self._indoor_pressure_sensor is not None:
+            schedule_update = (
+                False
+                if not self._update_sensor(
+                    self._indoor_pressure_sensor, None, indoor_pressure
+                )
+                else schedule_update
+            )
+
+        return schedule_update
+
+    def _expand_critical_temp_sensors(self):
+        """Replace groups of critical temperature sensors with their members.
+
+        Returns whether the probes changed.
+        """
+        expanded = []
+        groups = set()
+        for entity_id in self._critical_temp_sensor_config:
+            state = self.hass.states.get(entity_id)
+            members = None if state is None else state.attributes.get(ATTR_ENTITY_ID)
+            if isinstance(members, (list, tuple)):
+                groups.add(entity_id)
+                expanded.extend(member for member in members if member not in expanded)
+            elif entity_id not in expanded:
+                expanded.append(entity_id)
+            # Entities without a state yet may turn out to be groups.
+            if state is None:
+                groups.add(entity_id)
+
+        self._critical_temp_groups = frozenset(groups)
+        if tuple(expanded) == self.critical_temp_sensors:
+            return False
+        self.critical_temp_sensors = tuple(expanded)
+        self._critical_temp_entities = frozenset(expanded)
+        return True
+
+    @callback
+    def _async_track_inputs(self):
+        """Listen to state changes of the inputs and of groups of probes."""
+        if self._unsub_state is not None:
+            self._unsub_state()
+
+        entities = {
+            self._indoor_temp_sensor,
+            *self.critical_temp_sensors,
+            *self._critical_temp_groups,
+            self._indoor_humidity_sensor,
+        }
+        if self._indoor_pressure_sensor is not None:
+            entities.add(self._indoor_pressure_sensor)
+
+        self._unsub_state = async_track_state_change_event(
+            self.hass,
+            list(entities),
+            self._async_state_listener,
+        )
+
+    @callback
+    def _async_regroup(self):
+        """Follow a change of the members of a group of probes.
+
+        Probes that left are no longer used for the critical temperature, and
+        new ones are read right away.
+        """
+        previous = self._critical_temp_entities
+        if not self._expand_critical_temp_sensors():
+            return
+
+        _LOGGER.debug("Critical temperature sensors of %s changed", self._key)
+        self._async_track_inputs()
+        changed = False
+        for entity in previous - self._critical_temp_entities:
+            self._filters.pop(entity, None)
+            self._smoothed.pop(entity, None)
+            if entity in self.input_faults:
+                self._forget_fault(entity)
+            if entity in self._crit_temps:
+                self._update_crit_temp(entity, None)
+                changed = True
+        for entity in self._critical_temp_entities - previous:
+            if self._update_sensor(entity, None, self.hass.states.get(entity)):
+                changed = True
+
+        if changed:
+            self._async_schedule_recalculate()
+
+    @callback
+    def _async_state_listener(self, event):
+        """Handle for state changes for dependent sensors."""
+        new_state = event.data.get("new_state")
+        old_state = event.data.get("old_state")
+        entity = event.data.get("entity_id")
+        _LOGGER.debug(
+            "Sensor state change for %s that had old state %s and new state %s",
+            entity,
+            old_state,
+            new_state,
+        )
+
+        if entity in self._critical_temp_groups:
+            self._async_regroup()
+        if self._update_sensor(entity, old_state, new_state):
+            self._async_schedule_recalculate()
+
+    @callback
+    def _async_schedule_recalculate(self):
+        """Recalculate once for all input changes within the coalesce window.
+
+        Without a window, changes are recalculated at the end of the loop
+        iteration. Recalculations are at least min_update_interval apart.
+        Changes until then are recalculated together once it has passed, with
+        the latest state of every input.
+        """
+        if self._unsub_recalculate is not None:
+            return
+
+        delay = self._coalesce_window
+        if self._min_update_interval and self._last_recalculate is not None:
+            delay = max(
+                delay,
+                self._last_recalculate + self._min_update_interval - time.monotonic(),
+            )
+
+        if delay <= 0:
+            _async_schedule_pending(self.hass, self)
+            return
+
+        self._unsub_recalculate = async_call_later(
+            self.hass, delay, self._async_delayed_recalculate
+        )
+
+    @callback
+    def _async_delayed_recalculate(self, _now):
+        """Recalculate once the coalesce window or update interval has passed."""
+        self._unsub_recalculate = None
+        self.async_recalculate()
+
+    @callback
+    def async_recalculate(self):
+        """Run the calculation chain once and notify every subscriber."""
+        self.update()
+        self.async_notify()
+
+    @callback
+    def async_notify(self):
+        """Notify every subscriber of the latest results."""
+        for entity in list(self._subscribers):
+            entity.async_handle_engine_update()
+
+    def _update_sensor(self, entity, old_state, new_state):
+        """Update information based on new sensor states."""
+        _LOGGER.debug("Sensor update for %s", entity)
+        if new_state is None:
+            return False
+
+        if old_state is None and new_state.state == STATE_UNKNOWN:
+            return False
+
+        if entity == self._indoor_temp_sensor:
+            name = CONF_INDOOR_TEMP
+            parsed = OptimalHumidityEngine._update_temp_sensor(new_state)
+        elif entity in self._critical_temp_entities:
+            name = CONF_CRITICAL_TEMP
+            parsed = OptimalHumidityEngine._update_temp_sensor(new_state)
+        elif entity == self._indoor_humidity_sensor:
+            name = CONF_INDOOR_HUMIDITY
+            parsed = OptimalHumidityEngine._update_hum_sensor(new_state)
+        elif entity == self._indoor_pressure_sensor:
+            name = CONF_INDOOR_PRESSURE
+            parsed = OptimalHumidityEngine._update_pressure_sensor(new_state)
+        else:
+            return False
+
+        self.last_input = time.monotonic()
+        value = self._smooth(name, entity, self._track_fault(entity, parsed))
+        if value is _UNCHANGED:
+            _LOGGER.debug("Smoothed value of %s is unchanged", entity)
+            return False
+
+        if name == CONF_INDOOR_TEMP:
+            self._indoor_temp = value
+        elif name == CONF_CRITICAL_TEMP:
+            self._update_crit_temp(entity, value)
+        elif name == CONF_INDOOR_HUMIDITY:
+            self._indoor_hum = value
+        else:
+            self._indoor_pressure = value
+
+        if self.cache is not None:
+            self._quantize_inputs()
+
+        return True
+
+    def _track_fault(self, entity, parsed):
+        """Keep what is wrong with the state of an input and return its value.
+
+        Faults that need the input sensor fixed are raised as a repairs issue
+        of the input until it is.
+        """
+        value, fault = parsed
+        if fault is None:
+            previous = self.input_faults.pop(entity, None)
+        else:
+            previous = self.input_faults.get(entity)
+            self.input_faults[entity] = fault
+
+        if fault == previous:
+            return value
+        if fault in REPAIR_FAULTS:
+            async_create_issue(
+                self.hass,
+                DOMAIN,
+                f"input_fault_{entity}",
+                is_fixable=False,
+                severity=IssueSeverity.WARNING,
+                translation_key=fault,
+                translation_placeholders={"entity_id": entity},
+            )
+        elif previous in REPAIR_FAULTS:
+            async_delete_issue(self.hass, DOMAIN, f"input_fault_{entity}")
+        return value
+
+    def _forget_fault(self, entity):
+        """Forget the fault of an input the engine no longer uses.
+
+        Repairs issues of inputs that other engines still use are kept.
+        """
+        engines = self.hass.data.get(DOMAIN_DATA, {}).values()
+        if any(
+            engine is not self and entity in engine.input_faults for engine in engines
+        ):
+            del self.input_faults[entity]
+        else:
+            self._track_fault(entity, (None, None))
+
+    def _smooth(self, name, entity, value):
+        """Pass a measurement through the filter of its input, if it has one.
+
+        Every entity has its own filter, so every critical temperature sensor
+        is smoothed on its own before the coldest is picked. Returns
+        _UNCHANGED when the smoothed value moved less than the resolution of
+        its input since it was last used, so a filtered sensor that jitters
+        does not recalculate with every measurement.
+        """
+        measurement_filter = self._filters.get(entity)
+        if measurement_filter is None:
+            config = self._smoothing.get(name)
+            if config is None:
+                return value
+            measurement_filter = self._filters[entity] = create_filter(config)
+
+        value = measurement_filter.update(value)
+        used = self._smoothed.get(entity)
+        if None not in (value, used) and abs(value - used) < _INPUT_RESOLUTIONS[name]:
+            return _UNCHANGED
+
+        self._smoothed[entity] = value
+        return value
+
+    def _update_crit_temp(self, entity, crit_temp):
+        """Update the temperature of a probe and find the coldest one."""
+        if crit_temp is None:
+            self._crit_temps.remove(entity)
+        else:
+            self._crit_temps.set(entity, crit_temp)
+
+        coldest = self._crit_temps.peek()
+        if coldest is None:
+            self.critical_temp_sensor = None
+            self._crit_temp = None
+        else:
+            self.critical_temp_sensor, self._crit_temp = coldest
+
+    def _quantize_inputs(self):
+        """Quantize inputs so repeated measurements share cached results."""
+        self._indoor_temp = quantize(self._indoor_temp, CACHE_TEMPERATURE_RESOLUTION)
+        self._crit_temp = quantize(self._crit_temp, CACHE_TEMPERATURE_RESOLUTION)
+        self._indoor_hum = quantize(self._indoor_hum, CACHE_HUMIDITY_RESOLUTION)
+        self._indoor_pressure = quantize(
+            self._indoor_pressure, CACHE_PRESSURE_RESOLUTION
+        )
+
+    @staticmethod
+    def _parse_state(state, kind):
+        """Return the number of a state and what is wrong with it, if anything."""
+        value = util.convert(state.state, float)
+        if value is not None:
+            return value, None
+
+        # Unknown and unavailable states are faults of their own.
+        fault = (
+            state.state
+            if state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE)
+            else FAULT_NOT_NUMERIC
+        )
+        _WARNINGS.warning(
+            (state.entity_id, fault),
+            "Unable to parse %s sensor %s with state: %s",
+            kind,
+            state.entity_id,
+            state.state,
+        )
+        return None, fault
+
+    @staticmethod
+    def _update_temp_sensor(state):
+        """Parse temperature sensor value.
+
+        Returns the temperature in °C, or None and what is wrong with the state.
+        """
+        _LOGGER.debug("Updating temp sensor with value %s", state.state)
+
+        temp, fault = OptimalHumidityEngine._parse_state(state, "temperature")
+        if fault is not None:
+            return None, fault
+
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if unit == UnitOfTemperature.FAHRENHEIT:
+            return (
+                TemperatureConverter.convert(
+                    temp, UnitOfTemperature.FAHRENHEIT, UnitOfTemperature.CELSIUS
+                ),
+                None,
+            )
+        if unit == UnitOfTemperature.CELSIUS:
+            return temp, None
+        _WARNINGS.warning(
+            (state.entity_id, FAULT_UNSUPPORTED_UNIT),
+            "Temp sensor %s has unsupported unit: %s (allowed: %s, %s)",
+            state.entity_id,
+            unit,
+            UnitOfTemperature.CELSIUS,
+            UnitOfTemperature.FAHRENHEIT,
+        )
+
+        return None, FAULT_UNSUPPORTED_UNIT
+
+    @staticmethod
+    def _update_hum_sensor(state):
+        """Parse humidity sensor value.
+
+        Returns the relative humidity between 0 and 1, or None and what is
+        wrong with the state.
+        """
+        _LOGGER.debug("Updating humidity sensor with value %s", state.state)
+
+        hum, fault = OptimalHumidityEngine._parse_state(state, "humidity")
+        if fault is not None:
+            return None, fault
+
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if unit != PERCENTAGE:
+            _WARNINGS.warning(
+                (state.entity_id, FAULT_UNSUPPORTED_UNIT),
+                "Humidity sensor %s has unsupported unit: %s (allowed: %s)",
+                state.entity_id,
+                unit,
+                PERCENTAGE,
+            )
+            return None, FAULT_UNSUPPORTED_UNIT
+
+        if hum > 100 or hum < 0:
+            _WARNINGS.warning(
+                (state.entity_id, FAULT_OUT_OF_RANGE),
+                "Humidity sensor %s is out of range: %s %s",
+                state.entity_id,
+                hum,
+                "(allowed: 0-100%)",
+            )
+            return None, FAULT_OUT_OF_RANGE
+
+        return hum / 100, None
+
+    @staticmethod
+    def _update_pressure_sensor(state):
+        """Parse pressure sensor value.
+
+        Returns the pressure in Pa, or None and what is wrong with the state.
+        """
+        _LOGGER.debug("Updating pressure sensor with value %s", state.state)
+
+        pressure, fault = OptimalHumidityEngine._parse_state(state, "pressure")
+        if fault is not None:
+            return None, fault
+
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if unit == UnitOfPressure.HPA:
+            return pressure * 100, None
+
+        if unit == UnitOfPressure.PA:
+            return pressure, None
+
+        _WARNINGS.warning(
+            (state.entity_id, FAULT_UNSUPPORTED_UNIT),
+            "Pressure sensor %s has unsupported unit: %s (allowed: %s, %s)",
+            state.entity_id,
+            unit,
+            UnitOfPressure.HPA,
+            UnitOfPressure.PA,
+        )
+        return None, FAULT_UNSUPPORTED_UNIT
+
+    def _inputs(self):
+        """Return the current inputs of the calculation."""
+        return CalculationInputs(
+            self._indoor_temp,
+            self._indoor_hum,
+            self._crit_temp,
+            self._indoor_pressure,
+            self._comfortable_specific_humidity,
+            self._math_engine,
+        )
+
+    def update(self):
+        """Calculate latest results for the metrics subscribers publish.
+
+        Other metrics are only calculated once they are read from results.
+        Metrics that the changed inputs do not affect are kept from the last
+        update. They and the metrics taken from the cache are listed in
+        restored.
+        """
+        _LOGGER.debug("Update results for %s", self._key)
+        self._last_recalculate = time.monotonic()
+        start = time.perf_counter()
+
+        inputs = self._inputs()
+        self._calculation = self._calculation.changed(
+            inputs, None if self.cache is None else self.cache.lookup(inputs)
+        )
+        self.restored = self._calculation.calculated()
+        if self._mold_subscribers:
+            self._update_mold_growth()
+
+        for metric in set(self._subscribers.values()):
+            if metric in METRIC_DEPENDENCIES:
+                self._calculation.get(metric)
+
+        self.last_update_duration = time.perf_counter() - start
+
+    def set_unavailable(self):
+        """Drop every metric, so the sensors of the engine are unavailable.
+
+        The next update calculates every metric again from its inputs.
+        """
+        self._calculation = Calculation(
+            CalculationInputs(None, None, None, None, None, self._math_engine),
+            [None] * len(METRIC_DEPENDENCIES),
+            self._key,
+        )
+        self.restored = _NOTHING_RESTORED
+
+    def _update_mold_growth(self):
+        """Advance the mold index by the time since the last update.
+
+        Only done while a subscriber publishes the mold index, as it needs
+        the critical humidity, which is otherwise not always calculated.
+        The conditions at the critical temperature sensor are taken as
+        constant between updates, so the index is advanced with the
+        conditions of the last update, and the current ones are kept for the
+        next. Time without a critical humidity is left out.
+        """
+        now = time.monotonic()
+        if self._mold_conditions is not None:
+            self.mold_growth.advance(
+                (now - self._last_mold_update) / 3600, *self._mold_conditions
+            )
+        self._last_mold_update = now
+
+        crit_temp = self._calculation.inputs.crit_temp
+        crit_humidity = self._calculation.get(ATTR_CRITICAL_HUMIDITY)
+        if None in (crit_temp, crit_humidity):
+            self._mold_conditions = None
+            return
+
+        if self.mold_growth is None:
+            self.mold_growth = MoldGrowthIndex()
+        self._mold_conditions = (crit_temp, crit_humidity)
+
+    def restore_mold_growth(self, data):
+        """Continue the mold index from data saved by a sensor before a restart.
+
+        The time Home Assistant was not running is left out. Only the first
+        sensor to restore it is used.
+        """
+        if self.mold_growth is not None:
+            return
+        try:
+            self.mold_growth = MoldGrowthIndex.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.debug("Unable to restore the mold index of %s", self._key)
+
+    def get(self, metric):
+        """Return a metric, calculating it and its dependencies if needed."""
+        if metric == ATTR_MOLD_INDEX:
+            if self.mold_growth is None:
+                return None
+            return round(self.mold_growth.index, 2)
+        return self._calculation.get(metric)
+
+
+class EngineResults(Mapping):
+    """Read-only view of engine results that calculates metrics on access."""
+
+    __slots__ = ("_engine",)
+
+    def __init__(self, engine):
+        """Initialize the view."""
+        self._engine = engine
+
+    def __getitem__(self, metric):
+        if metric not in METRIC_DEPENDENCIES and metric != ATTR_MOLD_INDEX:
+            raise KeyError(metric)
+        return self._engine.get(metric)
+
+    def __iter__(self):
+        yield from METRIC_DEPENDENCIES
+        yield ATTR_MOLD_INDEX
+
+    def __len__(self):
+        return len(METRIC_DEPENDENCIES) + 1
@@ -0,0 +1,136 @@
+"""Lookup table based psychrometric functions for the fast math engine.
+
+Mirrors the psychrometrics module, so either module can be used as the
+calculation backend. Saturation vapor pressure is tabulated once at import
+over MIN_TEMPERATURE to MAX_TEMPERATURE and linearly interpolated, and dew
+points are found by inverting the same table instead of the Newton-Raphson
+solver. Inputs outside of the table fall back to the psychrometrics module.
+
+Compared to the psychrometrics module over the table range, the maximum
+error is below MAX_TEMPERATURE_ERROR °C for dew points and MAX_RELATIVE_ERROR
+for saturation vapor pressure, relative humidity and humidity ratio; both
+are well below the precision the sensors publish.
+"""
+
+import bisect
+
+from . import psychrometrics
+from .psychrometrics import (
+    GetHumRatioFromSpecificHum,
+    GetHumRatioFromVapPres,
+    GetSpecificHumFromHumRatio,
+    GetStandardAtmPressure,
+    GetVapPresFromHumRatio,
+)
+
+# The grid is anchored on the triple point of water, where the formulae switch
+# between the saturation pressure formulae over ice and over liquid water.
+MIN_TEMPERATURE = -39.99
+MAX_TEMPERATURE = 60.01
+TEMPERATURE_STEP = 0.05
+
+# Measured against the psychrometrics module over the whole table range.
+MAX_TEMPERATURE_ERROR = 0.0001
+MAX_RELATIVE_ERROR = 0.000005
+
+__all__ = [
+    "GetHumRatioFromRelHum",
+    "GetHumRatioFromSpecificHum",
+    "GetHumRatioFromTDewPoint",
+    "GetHumRatioFromVapPres",
+    "GetRelHumFromHumRatio",
+    "GetRelHumFromTDewPoint",
+    "GetRelHumFromVapPres",
+    "GetSatVapPres",
+    "GetSpecificHumFromHumRatio",
+    "GetStandardAtmPressure",
+    "GetTDewPointFromRelHum",
+    "GetTDewPointFromVapPres",
+    "GetVapPresFromHumRatio",
+    "GetVapPresFromRelHum",
+]
+
+
+def _build_table():
+    """Tabulate saturation vapor pressure over the supported range."""
+    count = round((MAX_TEMPERATURE - MIN_TEMPERATURE) / TEMPERATURE_STEP) + 1
+    return [
+        psychrometrics.GetSatVapPres(MIN_TEMPERATURE + index * TEMPERATURE_STEP)
+        for index in range(count)
+    ]
+
+
+SAT_VAP_PRES_TABLE = _build_table()
+_LAST_INDEX = len(SAT_VAP_PRES_TABLE) - 2
+
+
+def GetSatVapPres(TDryBulb):
+    """Return saturation vapor pressure in Pa given dry-bulb temperature."""
+    if not MIN_TEMPERATURE <= TDryBulb <= MAX_TEMPERATURE:
+        return psychrometrics.GetSatVapPres(TDryBulb)
+
+    position = (TDryBulb - MIN_TEMPERATURE) / TEMPERATURE_STEP
+    index = min(int(position), _LAST_INDEX)
+    lower = SAT_VAP_PRES_TABLE[index]
+    return lower + (SAT_VAP_PRES_TABLE[index + 1] - lower) * (position - index)
+
+
+def GetTDewPointFromVapPres(TDryBulb, VapPres):
+    """Return dew-point temperature given dry-bulb temperature and vapor pressure."""
+    if not SAT_VAP_PRES_TABLE[0] <= VapPres <= SAT_VAP_PRES_TABLE[-1]:
+        return psychrometrics.GetTDewPointFromVapPres(TDryBulb, VapPres)
+
+    index = min(bisect.bisect_right(SAT_VAP_PRES_TABLE, VapPres) - 1, _LAST_INDEX)
+    lower = SAT_VAP_PRES_TABLE[index]
+    fraction = (VapPres - lower) / (SAT_VAP_PRES_TABLE[index + 1] - lower)
+    TDewPoint = MIN_TEMPERATURE + (index + fraction) * TEMPERATURE_STEP
+    return min(TDewPoint, TDryBulb)
+
+
+def GetVapPresFromRelHum(TDryBulb, RelHum):
+    """Return partial pressure of water vapor given temperature and relative humidity."""
+    if RelHum < 0 or RelHum > 1:
+        raise ValueError("Relative humidity is outside range [0, 1]")
+
+    return RelHum * GetSatVapPres(TDryBulb)
+
+
+def GetRelHumFromVapPres(TDryBulb, VapPres):
+    """Return relative humidity given dry-bulb temperature and vapor pressure."""
+    if VapPres < 0:
+        raise ValueError(
+            "Partial pressure of water vapor in moist air cannot be negative"
+        )
+
+    return VapPres / GetSatVapPres(TDryBulb)
+
+
+def GetTDewPointFromRelHum(TDryBulb, RelHum):
+    """Return dew-point temperature given dry-bulb temperature and relative humidity."""
+    return GetTDewPointFromVapPres(TDryBulb, GetVapPresFromRelHum(TDryBulb, RelHum))
+
+
+def GetRelHumFromTDewPoint(TDryBulb, TDewPoint):
+    """Return relative humidity given dry-bulb and dew-point temperature."""
+    if TDewPoint > TDryBulb:
+        raise ValueError("Dew point temperature is above dry bulb temperature")
+
+    return GetSatVapPres(TDewPoint) / GetSatVapPres(TDryBulb)
+
+
+def GetHumRatioFromTDewPoint(TDewPoint, Pressure):
+    """Return humidity ratio given dew-point temperature and pressure."""
+    return GetHumRatioFromVapPres(GetSatVapPres(TDewPoint), Pressure)
+
+
+def GetHumRatioFromRelHum(TDryBulb, RelHum, Pressure):
+    """Return humidity ratio given dry-bulb temperature, relative humidity and pressure."""
+    return GetHumRatioFromVapPres(GetVapPresFromRelHum(TDryBulb, RelHum), Pressure)
+
+
+def GetRelHumFromHumRatio(TDryBulb, HumRatio, Pressure):
+    """Return relative humidity given dry-bulb temperature, humidity ratio and pressure."""
+    if HumRatio < 0:
+        raise ValueError("Humidity ratio cannot be negative")
+
+    return GetRelHumFromVapPres(TDryBulb, GetVapPresFromHumRatio(HumRatio, Pressure))
@@ -0,0 +1,105 @@
+"""Streaming filters to smooth the measurements of input sensors.
+
+Every filter takes one measurement at a time and returns the smoothed value,
+keeping a fixed amount of state. A measurement of None, such as from a sensor
+that became unavailable, resets the filter and is passed on.
+"""
+
+import statistics
+from collections import deque
+
+from .const import (
+    CONF_FILTER,
+    DEFAULT_ALPHA,
+    DEFAULT_MEASUREMENT_NOISE,
+    DEFAULT_PROCESS_NOISE,
+    DEFAULT_WINDOW,
+    FILTER_EMA,
+    FILTER_KALMAN,
+    FILTER_MEDIAN,
+)
+
+
+class ExponentialMovingAverage:
+    """Exponential moving average, weighing new measurements by alpha."""
+
+    __slots__ = ("alpha", "_value")
+
+    def __init__(self, alpha=DEFAULT_ALPHA):
+        """Initialize the filter."""
+        self.alpha = alpha
+        self._value = None
+
+    def update(self, measurement):
+        """Add a measurement and return the smoothed value."""
+        if measurement is None or self._value is None:
+            self._value = measurement
+        else:
+            self._value += self.alpha * (measurement - self._value)
+        return self._value
+
+
+class RollingMedian:
+    """Median of the last window measurements, which ignores single spikes."""
+
+    __slots__ = ("_measurements",)
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """Initialize the filter."""
+        self._measurements = deque(maxlen=window)
+
+    def update(self, measurement):
+        """Add a measurement and return the smoothed value."""
+        if measurement is None:
+            self._measurements.clear()
+            return None
+        self._measurements.append(measurement)
+        return statistics.median(self._measurements)
+
+
+class KalmanFilter:
+    """One dimensional Kalman filter for a slowly changing value.
+
+    process_noise is how much the value is expected to change between
+    measurements and measurement_noise how much the sensor jitters, both as
+    variances. Only their ratio matters, so they can be in any unit.
+    """
+
+    __slots__ = ("process_noise", "measurement_noise", "_value", "_variance")
+
+    def __init__(
+        self,
+        process_noise=DEFAULT_PROCESS_NOISE,
+        measurement_noise=DEFAULT_MEASUREMENT_NOISE,
+    ):
+        """Initialize the filter."""
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self._value = None
+        self._variance = None
+
+    def update(self, measurement):
+        """Add a measurement and return the smoothed value."""
+        if measurement is None or self._value is None:
+            self._value = measurement
+            self._variance = self.measurement_noise
+            return measurement
+
+        variance = self._variance + self.process_noise
+        gain = variance / (variance + self.measurement_noise)
+        self._value += gain * (measurement - self._value)
+        self._variance = (1 - gain) * variance
+        return self._value
+
+
+FILTERS = {
+    FILTER_EMA: ExponentialMovingAverage,
+    FILTER_MEDIAN: RollingMedian,
+    FILTER_KALMAN: KalmanFilter,
+}
+
+
+def create_filter(config):
+    """Return a new filter from its configuration."""
+    options = dict(config)
+    return FILTERS[options.pop(CONF_FILTER)](**options)
@@ -0,0 +1,81 @@
+"""Indexed binary heap to track the lowest of many changing values."""
+
+
+class IndexedMinHeap:
+    """Binary min-heap of values by key.
+
+    Setting or removing the value of a key is O(log n), so the lowest value
+    can be kept up to date as values change without rescanning all of them.
+    """
+
+    __slots__ = ("_heap", "_positions")
+
+    def __init__(self):
+        """Initialize an empty heap."""
+        self._heap = []
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def peek(self):
+        """Return the key and value with the lowest value, or None if empty."""
+        if not self._heap:
+            return None
+        value, key = self._heap[0]
+        return key, value
+
+    def set(self, key, value):
+        """Set the value of a key, adding it if needed."""
+        position = self._positions.get(key)
+        if position is None:
+            self._heap.append((value, key))
+            self._positions[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            return
+
+        self._heap[position] = (value, key)
+        self._sift_up(position)
+        self._sift_down(self._positions[key])
+
+    def remove(self, key):
+        """Remove a key if it is in the heap."""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+
+        last = self._heap.pop()
+        if position < len(self._heap):
+            self._heap[position] = last
+            self._positions[last[1]] = position
+            self._sift_up(position)
+            self._sift_down(self._positions[last[1]])
+
+    def _swap(self, first, second):
+        heap = self._heap
+        heap[first], heap[second] = heap[second], heap[first]
+        self._positions[heap[first][1]] = first
+        self._positions[heap[second][1]] = second
+
+    def _sift_up(self, position):
+        while position:
+            parent = (position - 1) // 2
+            if self._heap[position] >= self._heap[parent]:
+                return
+            self._swap(position, parent)
+            position = parent
+
+    def _sift_down(self, position):
+        size = len(self._heap)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self._heap[child] < self._heap[smallest]:
+                    smallest = child
+            if smallest == position:
+                return
+            self._swap(position, smallest)
+            position = smallest
@@ -0,0 +1,71 @@
+"""Instrumentation of how often and how expensively a sensor updates."""
+
+import math
+import time
+from collections import deque
+
+from .const import DIAGNOSTICS_SAMPLES
+
+
+class UpdateStatistics:
+    """Counters and compute durations of the updates of one sensor."""
+
+    __slots__ = (
+        "updates",
+        "recomputes",
+        "skipped_updates",
+        "last_duration",
+        "_durations",
+    )
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.updates = 0
+        self.recomputes = 0
+        self.skipped_updates = 0
+        self.last_duration = None
+        self._durations = deque(maxlen=DIAGNOSTICS_SAMPLES)
+
+    def record_update(self, recomputed, duration):
+        """Record an update from the engine and how long it took in seconds."""
+        self.updates += 1
+        if recomputed:
+            self.recomputes += 1
+        self.last_duration = duration
+        self._durations.append(duration)
+
+    def record_skipped_update(self):
+        """Record an update that was not written to Home Assistant."""
+        self.skipped_updates += 1
+
+    @property
+    def p95_duration(self):
+        """Return the 95th percentile of the recent compute durations."""
+        if not self._durations:
+            return None
+        durations = sorted(self._durations)
+        return durations[math.ceil(len(durations) * 0.95) - 1]
+
+    def as_dict(self, engine):
+        """Return the statistics as state attributes."""
+        attributes = {
+            "updates": self.updates,
+            "recomputes": self.recomputes,
+            "skipped_updates": self.skipped_updates,
+            "last_compute_ms": _milliseconds(self.last_duration),
+            "p95_compute_ms": _milliseconds(self.p95_duration),
+            "seconds_since_input": (
+                None
+                if engine.last_input is None
+                else round(time.monotonic() - engine.last_input, 1)
+            ),
+        }
+        if engine.cache is not None:
+            attributes["cache"] = engine.cache.cache_info()._asdict()
+        return attributes
+
+
+def _milliseconds(duration):
+    if duration is None:
+        return None
+    return round(duration * 1000, 3)
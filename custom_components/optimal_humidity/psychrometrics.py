@@ -0,0 +1,220 @@
+"""Psychrometric functions in SI units.
+
+A port of the subset of psychrolib used by the integration, with the same
+equations, names and results, but fixed to SI units. psychrolib keeps its
+system of units in module state that has to be set before every use, which
+is not safe when other code uses it at the same time. These functions keep
+no state, so they can be used from any thread.
+"""
+
+import math
+
+ZERO_CELSIUS_AS_KELVIN = 273.15
+TRIPLE_POINT_WATER = 0.01
+MIN_HUM_RATIO = 1e-7
+TOLERANCE = 0.001
+MAX_ITER_COUNT = 100
+BOUNDS = (-100.0, 200.0)
+
+__all__ = [
+    "GetHumRatioFromRelHum",
+    "GetHumRatioFromSpecificHum",
+    "GetHumRatioFromTDewPoint",
+    "GetHumRatioFromVapPres",
+    "GetRelHumFromHumRatio",
+    "GetRelHumFromTDewPoint",
+    "GetRelHumFromVapPres",
+    "GetSatVapPres",
+    "GetSpecificHumFromHumRatio",
+    "GetStandardAtmPressure",
+    "GetTDewPointFromRelHum",
+    "GetTDewPointFromVapPres",
+    "GetVapPresFromHumRatio",
+    "GetVapPresFromRelHum",
+]
+
+
+def GetSatVapPres(TDryBulb):
+    """Return saturation vapor pressure in Pa given dry-bulb temperature.
+
+    Uses the ASHRAE formulae over ice below and over liquid water above the
+    triple point of water (ASHRAE Handbook - Fundamentals (2017) ch. 1 eqn 5 & 6).
+    """
+    if TDryBulb < BOUNDS[0] or TDryBulb > BOUNDS[1]:
+        raise ValueError("Dry bulb temperature must be in range [-100, 200]°C")
+
+    T = TDryBulb + ZERO_CELSIUS_AS_KELVIN
+    if TDryBulb <= TRIPLE_POINT_WATER:
+        LnPws = (
+            -5.6745359e03 / T
+            + 6.3925247
+            - 9.677843e-03 * T
+            + 6.2215701e-07 * T**2
+            + 2.0747825e-09 * math.pow(T, 3)
+            - 9.484024e-13 * math.pow(T, 4)
+            + 4.1635019 * math.log(T)
+        )
+    else:
+        LnPws = (
+            -5.8002206e03 / T
+            + 1.3914993
+            - 4.8640239e-02 * T
+            + 4.1764768e-05 * T**2
+            - 1.4452093e-08 * math.pow(T, 3)
+            + 6.5459673 * math.log(T)
+        )
+    return math.exp(LnPws)
+
+
+def _d_ln_sat_vap_pres(TDryBulb):
+    """Return the derivative of the natural log of saturation vapor pressure."""
+    T = TDryBulb + ZERO_CELSIUS_AS_KELVIN
+    if TDryBulb <= TRIPLE_POINT_WATER:
+        return (
+            5.6745359e03 / math.pow(T, 2)
+            - 9.677843e-03
+            + 2 * 6.2215701e-07 * T
+            + 3 * 2.0747825e-09 * math.pow(T, 2)
+            - 4 * 9.484024e-13 * math.pow(T, 3)
+            + 4.1635019 / T
+        )
+    return (
+        5.8002206e03 / math.pow(T, 2)
+        - 4.8640239e-02
+        + 2 * 4.1764768e-05 * T
+        - 3 * 1.4452093e-08 * math.pow(T, 2)
+        + 6.5459673 / T
+    )
+
+
+_MIN_VAP_PRES = GetSatVapPres(BOUNDS[0])
+_MAX_VAP_PRES = GetSatVapPres(BOUNDS[1])
+
+
+def GetTDewPointFromVapPres(TDryBulb, VapPres):
+    """Return dew-point temperature given dry-bulb temperature and vapor pressure.
+
+    Inverts GetSatVapPres with Newton-Raphson iterations on the logarithm of
+    the vapor pressure, starting from the dry-bulb temperature.
+    """
+    if VapPres < _MIN_VAP_PRES or VapPres > _MAX_VAP_PRES:
+        raise ValueError(
+            "Partial pressure of water vapor is outside range of validity of equations"
+        )
+
+    TDewPoint = TDryBulb
+    lnVP = math.log(VapPres)
+    index = 1
+    while True:
+        TDewPoint_iter = TDewPoint
+        lnVP_iter = math.log(GetSatVapPres(TDewPoint_iter))
+        d_lnVP = _d_ln_sat_vap_pres(TDewPoint_iter)
+        TDewPoint = TDewPoint_iter - (lnVP_iter - lnVP) / d_lnVP
+        TDewPoint = max(TDewPoint, BOUNDS[0])
+        TDewPoint = min(TDewPoint, BOUNDS[1])
+
+        if math.fabs(TDewPoint - TDewPoint_iter) <= TOLERANCE:
+            break
+        if index > MAX_ITER_COUNT:
+            raise ValueError(
+                "Convergence not reached in GetTDewPointFromVapPres. Stopping."
+            )
+        index = index + 1
+
+    return min(TDewPoint, TDryBulb)
+
+
+def GetVapPresFromRelHum(TDryBulb, RelHum):
+    """Return partial pressure of water vapor given temperature and relative humidity."""
+    if RelHum < 0 or RelHum > 1:
+        raise ValueError("Relative humidity is outside range [0, 1]")
+
+    return RelHum * GetSatVapPres(TDryBulb)
+
+
+def GetRelHumFromVapPres(TDryBulb, VapPres):
+    """Return relative humidity given dry-bulb temperature and vapor pressure."""
+    if VapPres < 0:
+        raise ValueError(
+            "Partial pressure of water vapor in moist air cannot be negative"
+        )
+
+    return VapPres / GetSatVapPres(TDryBulb)
+
+
+def GetTDewPointFromRelHum(TDryBulb, RelHum):
+    """Return dew-point temperature given dry-bulb temperature and relative humidity."""
+    if RelHum < 0 or RelHum > 1:
+        raise ValueError("Relative humidity is outside range [0, 1]")
+
+    return GetTDewPointFromVapPres(TDryBulb, GetVapPresFromRelHum(TDryBulb, RelHum))
+
+
+def GetRelHumFromTDewPoint(TDryBulb, TDewPoint):
+    """Return relative humidity given dry-bulb and dew-point temperature."""
+    if TDewPoint > TDryBulb:
+        raise ValueError("Dew point temperature is above dry bulb temperature")
+
+    return GetSatVapPres(TDewPoint) / GetSatVapPres(TDryBulb)
+
+
+def GetHumRatioFromVapPres(VapPres, Pressure):
+    """Return humidity ratio given water vapor pressure and atmospheric pressure."""
+    if VapPres < 0:
+        raise ValueError(
+            "Partial pressure of water vapor in moist air cannot be negative"
+        )
+
+    return max(0.621945 * VapPres / (Pressure - VapPres), MIN_HUM_RATIO)
+
+
+def GetVapPresFromHumRatio(HumRatio, Pressure):
+    """Return vapor pressure given humidity ratio and pressure."""
+    if HumRatio < 0:
+        raise ValueError("Humidity ratio is negative")
+
+    BoundedHumRatio = max(HumRatio, MIN_HUM_RATIO)
+    return Pressure * BoundedHumRatio / (0.621945 + BoundedHumRatio)
+
+
+def GetHumRatioFromTDewPoint(TDewPoint, Pressure):
+    """Return humidity ratio given dew-point temperature and pressure."""
+    return GetHumRatioFromVapPres(GetSatVapPres(TDewPoint), Pressure)
+
+
+def GetHumRatioFromRelHum(TDryBulb, RelHum, Pressure):
+    """Return humidity ratio given dry-bulb temperature, relative humidity and pressure."""
+    if RelHum < 0 or RelHum > 1:
+        raise ValueError("Relative humidity is outside range [0, 1]")
+
+    return GetHumRatioFromVapPres(GetVapPresFromRelHum(TDryBulb, RelHum), Pressure)
+
+
+def GetRelHumFromHumRatio(TDryBulb, HumRatio, Pressure):
+    """Return relative humidity given dry-bulb temperature, humidity ratio and pressure."""
+    if HumRatio < 0:
+        raise ValueError("Humidity ratio cannot be negative")
+
+    return GetRelHumFromVapPres(TDryBulb, GetVapPresFromHumRatio(HumRatio, Pressure))
+
+
+def GetSpecificHumFromHumRatio(HumRatio):
+    """Return the specific humidity from humidity ratio."""
+    if HumRatio < 0:
+        raise ValueError("Humidity ratio cannot be negative")
+
+    BoundedHumRatio = max(HumRatio, MIN_HUM_RATIO)
+    return BoundedHumRatio / (1.0 + BoundedHumRatio)
+
+
+def GetHumRatioFromSpecificHum(SpecificHum):
+    """Return the humidity ratio from specific humidity."""
+    if SpecificHum < 0.0 or SpecificHum >= 1.0:
+        raise ValueError("Specific humidity is outside range [0, 1)")
+
+    return max(SpecificHum / (1.0 - SpecificHum), MIN_HUM_RATIO)
+
+
+def GetStandardAtmPressure(Altitude):
+    """Return standard atmosphere barometric pressure in Pa given the altitude in m."""
+    return 101325 * math.pow(1 - 2.25577e-05 * Altitude, 5.2559)
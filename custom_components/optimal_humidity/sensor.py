@@ -1,36 +1,61 @@
 """Calculates critical humidity given critical temperature, current temperature and current humidity."""
+
 import logging
-import bisect
+import time
+from datetime import timedelta
+from types import MappingProxyType
 
 import voluptuous as vol
-import psychrolib
 
 from .const import (
-    ATTR_COMFORTABLE_HUMIDITY,
     ATTR_OPTIMAL_HUMIDEX,
     DEFAULT_NAME,
+    DOMAIN,
+    PLATFORMS,
     CONF_INDOOR_TEMP,
     CONF_INDOOR_HUMIDITY,
     CONF_CRITICAL_TEMP,
     CONF_INDOOR_PRESSURE,
-    MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR,
-    IDEAL_HUMIDITY,
-    IDEAL_TEMPERATURE,
-    SENSOR_TYPES,
     ATTR_OPTIMAL_HUMIDITY,
-    ATTR_CRITICAL_HUMIDITY,
     ATTR_DEWPOINT,
-    ATTR_SPECIFIC_HUMIDITY,
-    ATTR_MOLD_WARNING,
     ATTR_HUMIDEX,
-    ATTR_HUMIDEX_COMFORT,
     CONF_COMFORTABLE_SPECIFIC_HUMIDITY,
-    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,
+    ATTR_DIAGNOSTICS,
+    ATTR_CRITICAL_TEMP_SENSOR,
+    ATTR_INPUT_FAULT,
+    CONF_MATH_ENGINE,
+    CONF_COALESCE_WINDOW,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_DEADBAND,
+    CONF_RELATIVE_DEADBAND,
+    CONF_CACHE_SIZE,
+    CONF_DIAGNOSTICS,
+    CONF_SMOOTHING,
+    CONF_FILTER,
+    CONF_ALPHA,
+    CONF_WINDOW,
+    CONF_PROCESS_NOISE,
+    CONF_MEASUREMENT_NOISE,
+    DEFAULT_ALPHA,
+    DEFAULT_WINDOW,
+    DEFAULT_PROCESS_NOISE,
+    DEFAULT_MEASUREMENT_NOISE,
+    FILTER_EMA,
+    FILTER_MEDIAN,
+    FILTER_KALMAN,
+    DEFAULT_CACHE_SIZE,
+    MATH_ENGINE_FAST,
+    MATH_ENGINE_PSYCHROLIB,
+    METRICS,
+    SENSOR_TYPES,
 )
+from .cache import CalculationCache
+from .engine import async_get_engine
+from .instrumentation import UpdateStatistics
 
-from homeassistant import util
-
+from homeassistant.util import slugify
 from homeassistant.util.unit_system import METRIC_SYSTEM
+from homeassistant.util.unit_conversion import TemperatureConverter
 
 from homeassistant.components.sensor import (
     ENTITY_ID_FORMAT,
@@ -39,104 +64,260 @@ from homeassistant.components.sensor import (
 from homeassistant.components.sensor import SensorDeviceClass
 
 from homeassistant.const import (
-    ATTR_UNIT_OF_MEASUREMENT,
+    CONF_MONITORED_CONDITIONS,
     CONF_NAME,
     CONF_SENSORS,
     CONF_TYPE,
-    EVENT_HOMEASSISTANT_START,
-    PERCENTAGE,
+    STATE_UNAVAILABLE,
     STATE_UNKNOWN,
-    UnitOfPressure,
     UnitOfTemperature,
 )
 from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.entity import Entity, async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import async_generate_entity_id
+from homeassistant.helpers.reload import async_setup_reload_service
+from homeassistant.helpers.restore_state import RestoredExtraData, RestoreEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+# Attributes in °C that are converted to °F outside of the metric system.
+TEMPERATURE_ATTRIBUTES = (ATTR_DEWPOINT, ATTR_HUMIDEX, ATTR_OPTIMAL_HUMIDEX)
+
+DEADBAND_SCHEMA = vol.Schema({vol.In(METRICS): cv.positive_float})
+
+FILTER_SCHEMA = vol.Any(
+    vol.Schema(
+        {
+            vol.Required(CONF_FILTER): FILTER_EMA,
+            vol.Optional(CONF_ALPHA, default=DEFAULT_ALPHA): vol.All(
+                vol.Coerce(float), vol.Range(min=0, min_included=False, max=1)
+            ),
+        }
+    ),
+    vol.Schema(
+        {
+            vol.Required(CONF_FILTER): FILTER_MEDIAN,
+            vol.Optional(CONF_WINDOW, default=DEFAULT_WINDOW): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+        }
+    ),
+    vol.Schema(
+        {
+            vol.Required(CONF_FILTER): FILTER_KALMAN,
+            vol.Optional(
+                CONF_PROCESS_NOISE, default=DEFAULT_PROCESS_NOISE
+            ): cv.positive_float,
+            vol.Optional(
+                CONF_MEASUREMENT_NOISE, default=DEFAULT_MEASUREMENT_NOISE
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+        }
+    ),
+)
+
+SMOOTHING_SCHEMA = vol.Schema(
+    {
+        vol.In(
+            (
+                CONF_INDOOR_TEMP,
+                CONF_CRITICAL_TEMP,
+                CONF_INDOOR_HUMIDITY,
+                CONF_INDOOR_PRESSURE,
+            )
+        ): FILTER_SCHEMA
+    }
+)
+
 SENSOR_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_INDOOR_TEMP): cv.entity_id,
-        vol.Required(CONF_CRITICAL_TEMP): cv.entity_id,
+        vol.Required(CONF_CRITICAL_TEMP): cv.entity_ids,
         vol.Required(CONF_INDOOR_HUMIDITY): cv.entity_id,
         vol.Optional(CONF_INDOOR_PRESSURE): cv.entity_id,
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
         vol.Optional(CONF_TYPE, default=ATTR_OPTIMAL_HUMIDITY): vol.All(
-            cv.string,
-            vol.In(
-                (
-                    ATTR_DEWPOINT,
-                    ATTR_SPECIFIC_HUMIDITY,
-                    ATTR_CRITICAL_HUMIDITY,
-                    ATTR_OPTIMAL_HUMIDITY,
-                    ATTR_MOLD_WARNING,
-                    ATTR_HUMIDEX,
-                    ATTR_HUMIDEX_COMFORT,
-                    ATTR_COMFORTABLE_SPECIFIC_HUMIDITY,
-                    ATTR_OPTIMAL_HUMIDEX,
-                    ATTR_COMFORTABLE_HUMIDITY,
-                )
-            ),
+            cv.string, vol.In(METRICS)
+        ),
+        vol.Optional(CONF_MONITORED_CONDITIONS): vol.All(
+            cv.ensure_list, [vol.In(METRICS)]
         ),
         vol.Optional(CONF_COMFORTABLE_SPECIFIC_HUMIDITY): cv.positive_float,
+        vol.Optional(CONF_DEADBAND, default={}): DEADBAND_SCHEMA,
+        vol.Optional(CONF_RELATIVE_DEADBAND, default={}): DEADBAND_SCHEMA,
+        vol.Optional(CONF_DIAGNOSTICS, default=False): cv.boolean,
+        vol.Optional(CONF_SMOOTHING, default={}): SMOOTHING_SCHEMA,
+        vol.Optional(CONF_MIN_UPDATE_INTERVAL): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
     }
 )
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_SENSORS): cv.schema_with_slug_keys(SENSOR_SCHEMA),
+        vol.Optional(CONF_MATH_ENGINE, default=MATH_ENGINE_PSYCHROLIB): vol.In(
+            (MATH_ENGINE_PSYCHROLIB, MATH_ENGINE_FAST)
+        ),
+        vol.Optional(CONF_COALESCE_WINDOW, default=timedelta()): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
+        vol.Optional(CONF_CACHE_SIZE, default=DEFAULT_CACHE_SIZE): cv.positive_int,
+        vol.Optional(CONF_MIN_UPDATE_INTERVAL, default=timedelta()): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
     }
 )
 
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up OptimalHumidity sensor."""
+    await async_setup_reload_service(hass, DOMAIN, PLATFORMS)
 
-    for device, device_config in config[CONF_SENSORS].items():
-        name = device_config.get(CONF_NAME, DEFAULT_NAME)
-        indoor_temp_sensor = device_config.get(CONF_INDOOR_TEMP)
-        critical_temp_sensor = device_config.get(CONF_CRITICAL_TEMP)
-        indoor_humidity_sensor = device_config.get(CONF_INDOOR_HUMIDITY)
-        indoor_pressure_sensor = device_config.get(CONF_INDOOR_PRESSURE)
-        sensor_type = device_config.get(CONF_TYPE)
-        comfortable_specific_humidity = device_config.get(
-            CONF_COMFORTABLE_SPECIFIC_HUMIDITY
-        )
+    cache = (
+        CalculationCache(config[CONF_CACHE_SIZE]) if config[CONF_CACHE_SIZE] else None
+    )
 
+    for device, device_config in config[CONF_SENSORS].items():
         async_add_entities(
-            [
-                OptimalHumidity(
-                    name,
-                    device,
-                    hass,
-                    indoor_temp_sensor,
-                    critical_temp_sensor,
-                    indoor_humidity_sensor,
-                    indoor_pressure_sensor,
-                    sensor_type,
-                    comfortable_specific_humidity,
-                )
-            ],
+            _create_sensors(
+                hass,
+                device,
+                device_config,
+                config[CONF_MATH_ENGINE],
+                config[CONF_COALESCE_WINDOW],
+                config[CONF_MIN_UPDATE_INTERVAL],
+                cache,
+            ),
             False,
         )
 
 
-class OptimalHumidity(Entity):
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Set up the sensors of a room added from the UI, without a cache."""
+    options = dict(entry.options)
+    math_engine = options.pop(CONF_MATH_ENGINE, MATH_ENGINE_PSYCHROLIB)
+    device_config = SENSOR_SCHEMA({**options, CONF_NAME: entry.title})
+
+    sensors = _create_sensors(
+        hass,
+        slugify(entry.title),
+        device_config,
+        math_engine,
+        timedelta(),
+        timedelta(),
+        None,
+        entry.entry_id,
+    )
+
+    # Remove the sensors of metrics that are no longer monitored.
+    unique_ids = {sensor.unique_id for sensor in sensors}
+    registry = er.async_get(hass)
+    for registry_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if registry_entry.unique_id not in unique_ids:
+            registry.async_remove(registry_entry.entity_id)
+
+    async_add_entities(sensors, False)
+
+
+def _create_sensors(
+    hass,
+    device,
+    device_config,
+    math_engine,
+    coalesce_window,
+    min_update_interval,
+    cache,
+    entry_id=None,
+):
+    """Return the sensors of a room.
+
+    Sensors of a room added from the UI have a unique id from the entry_id
+    and their metric, so they can be renamed from the UI.
+    """
+    name = device_config.get(CONF_NAME, DEFAULT_NAME)
+    indoor_temp_sensor = device_config.get(CONF_INDOOR_TEMP)
+    critical_temp_sensors = tuple(device_config.get(CONF_CRITICAL_TEMP))
+    indoor_humidity_sensor = device_config.get(CONF_INDOOR_HUMIDITY)
+    indoor_pressure_sensor = device_config.get(CONF_INDOOR_PRESSURE)
+    sensor_type = device_config.get(CONF_TYPE)
+    comfortable_specific_humidity = device_config.get(
+        CONF_COMFORTABLE_SPECIFIC_HUMIDITY
+    )
+    deadband = device_config.get(CONF_DEADBAND)
+    relative_deadband = device_config.get(CONF_RELATIVE_DEADBAND)
+    diagnostics = device_config.get(CONF_DIAGNOSTICS)
+    smoothing = device_config.get(CONF_SMOOTHING)
+    min_update_interval = device_config.get(
+        CONF_MIN_UPDATE_INTERVAL, min_update_interval
+    )
+    monitored_conditions = device_config.get(CONF_MONITORED_CONDITIONS)
+
+    if monitored_conditions is None:
+        sensors = [(OptimalHumidity, name, device, sensor_type)]
+    else:
+        # One entity per metric, all fed by the same engine.
+        sensors = [
+            (
+                OptimalHumidityMetric,
+                f"{name} {metric.replace('_', ' ').capitalize()}",
+                f"{device}_{metric}",
+                metric,
+            )
+            for metric in dict.fromkeys(monitored_conditions)
+        ]
+
+    return [
+        sensor_class(
+            sensor_name,
+            device_id,
+            hass,
+            indoor_temp_sensor,
+            critical_temp_sensors,
+            indoor_humidity_sensor,
+            indoor_pressure_sensor,
+            metric,
+            comfortable_specific_humidity,
+            math_engine,
+            coalesce_window,
+            min_update_interval,
+            smoothing,
+            cache,
+            deadband,
+            relative_deadband,
+            diagnostics,
+            None if entry_id is None else f"{entry_id}_{metric}",
+        )
+        for sensor_class, sensor_name, device_id, metric in sensors
+    ]
+
+
+class OptimalHumidity(RestoreEntity):
     """Represents an OptimalHumidity sensor."""
 
+    # Every metric is published as an attribute.
+    _all_metrics = True
+
     def __init__(
         self,
         name,
         device_id,
         hass,
         indoor_temp_sensor,
-        critical_temp_sensor,
+        critical_temp_sensors,
         indoor_humidity_sensor,
         indoor_pressure_sensor,
         sensor_type,
         comfortable_specific_humidity,
+        math_engine,
+        coalesce_window,
+        min_update_interval,
+        smoothing,
+        cache,
+        deadband,
+        relative_deadband,
+        diagnostics,
+        unique_id=None,
     ):
         """Initialize the sensor."""
         self.hass = hass
@@ -145,586 +326,154 @@ class OptimalHumidity(Entity):
             ENTITY_ID_FORMAT, device_id, hass=hass
         )
         self._name = name
-        self._indoor_temp_sensor = indoor_temp_sensor
-        self._indoor_humidity_sensor = indoor_humidity_sensor
-        self._critical_temp_sensor = critical_temp_sensor
+        self._unique_id = unique_id
         self._sensor_type = sensor_type
         if hass.config.units is METRIC_SYSTEM:
             self._is_metric = True
         else:
             self._is_metric = False
 
-        psychrolib.SetUnitSystem(psychrolib.SI)
-        self._indoor_pressure = psychrolib.GetStandardAtmPressure(
-            hass.config.elevation)
-        _LOGGER.debug(
-            "Pressure at current elevation of %s m is %s Pa",
-            hass.config.elevation,
-            self._indoor_pressure,
+        self._engine = async_get_engine(
+            hass,
+            indoor_temp_sensor,
+            critical_temp_sensors,
+            indoor_humidity_sensor,
+            indoor_pressure_sensor,
+            comfortable_specific_humidity,
+            math_engine,
+            coalesce_window,
+            min_update_interval,
+            smoothing,
+            cache,
         )
 
-        if indoor_pressure_sensor is None:
-            self._indoor_pressure_sensor = None
-            self._entities = {
-                self._indoor_temp_sensor,
-                self._critical_temp_sensor,
-                self._indoor_humidity_sensor,
-            }
-        else:
-            self._indoor_pressure_sensor = indoor_pressure_sensor
-            self._entities = {
-                self._indoor_temp_sensor,
-                self._critical_temp_sensor,
-                self._indoor_humidity_sensor,
-                self._indoor_pressure_sensor,
-            }
-
         self._available = False
-        self._dewpoint = None
-        self._specific_humidity = None
-        self._indoor_temp = None
-        self._indoor_hum = None
-        self._crit_temp = None
-        self._crit_hum = None
-        self._optimal_humidity = None
-        self._mold_warning = None
-        self._humidex_attr = None
-        self._optimal_humidex = None
-        self._humidex_comfort = None
-        self._comfortable_specific_humidity_from_config = comfortable_specific_humidity
-        self._comfortable_specific_humidity = (
-            self._comfortable_specific_humidity_from_config
+        self._results = {}
+        self._attributes = None
+
+        self._deadband = deadband
+        self._relative_deadband = relative_deadband
+        self._tracked_metrics = (
+            {sensor_type, *deadband, *relative_deadband}
+            if deadband or relative_deadband
+            else None
         )
-        self._comfortable_humidity = None
+        self._published = None
+        self._stats = UpdateStatistics() if diagnostics else None
 
     async def async_added_to_hass(self):
-        """Register callbacks."""
-
-        @callback
-        def critical_humidity_sensors_state_listener(event):
-            """Handle for state changes for dependent sensors."""
-            new_state = event.data.get("new_state")
-            old_state = event.data.get("old_state")
-            entity = event.data.get("entity_id")
-            _LOGGER.debug(
-                "Sensor state change for %s that had old state %s and new state %s",
-                entity,
-                old_state,
-                new_state,
-            )
-
-            if self._update_sensor(entity, old_state, new_state):
-                self.async_schedule_update_ha_state(True)
-
-        @callback
-        def critical_humidity_startup(event):
-            """Add listeners."""
-            _LOGGER.debug("Startup for %s", self.entity_id)
-
-            async_track_state_change_event(
-                self.hass,
-                list(self._entities),
-                critical_humidity_sensors_state_listener,
-            )
-
-            indoor_temp = self.hass.states.get(self._indoor_temp_sensor)
-            crit_temp = self.hass.states.get(self._critical_temp_sensor)
-            indoor_hum = self.hass.states.get(self._indoor_humidity_sensor)
-            if self._indoor_pressure_sensor is not None:
-                indoor_pressure = self.hass.states.get(
-                    self._indoor_pressure_sensor)
-
-            schedule_update = self._update_sensor(
-                self._indoor_temp_sensor, None, indoor_temp
-            )
-
-            schedule_update = (
-                False
-                if not self._update_sensor(self._critical_temp_sensor, None, crit_temp)
-                else schedule_update
-            )
-
-            schedule_update = (
-                False
-                if not self._update_sensor(
-                    self._indoor_humidity_sensor, None, indoor_hum
-                )
-                else schedule_update
-            )
-
-            if self._indoor_pressure_sensor is not None:
-                schedule_update = (
-                    False
-                    if not self._update_sensor(
-                        self._indoor_pressure_sensor, None, indoor_pressure
-                    )
-                    else schedule_update
-                )
-
-            if schedule_update:
-                self.async_schedule_update_ha_state(True)
-
-        self.hass.bus.async_listen_once(
-            EVENT_HOMEASSISTANT_START, critical_humidity_startup
-        )
-
-    def _update_sensor(self, entity, old_state, new_state):
-        """Update information based on new sensor states."""
-        _LOGGER.debug("Sensor update for %s", entity)
-        if new_state is None:
-            return False
-
-        if old_state is None and new_state.state == STATE_UNKNOWN:
-            return False
-
-        if entity == self._indoor_temp_sensor:
-            self._indoor_temp = OptimalHumidity._update_temp_sensor(new_state)
-        elif entity == self._critical_temp_sensor:
-            self._crit_temp = OptimalHumidity._update_temp_sensor(new_state)
-        elif entity == self._indoor_humidity_sensor:
-            self._indoor_hum = OptimalHumidity._update_hum_sensor(new_state)
-        elif entity == self._indoor_pressure_sensor:
-            self._indoor_pressure = OptimalHumidity._update_pressure_sensor(
-                new_state)
-
-        return True
-
-    @staticmethod
-    def _update_temp_sensor(state):
-        """Parse temperature sensor value."""
-        _LOGGER.debug("Updating temp sensor with value %s", state.state)
-
-        if state.state == STATE_UNKNOWN:
-            _LOGGER.warning(
-                "Unable to parse temperature sensor %s with state: %s",
-                state.entity_id,
-                state.state,
-            )
-            return None
-
-        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
-        temp = util.convert(state.state, float)
-
-        if temp is None:
-            _LOGGER.warning(
-                "Unable to convert temperature sensor %s with state: %s",
-                state.entity_id,
-                state.state,
-            )
-            return None
+        """Restore the last state and register callbacks."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            self._restore_state(last_state)
+        last_extra_data = await self.async_get_last_extra_data()
+        if last_extra_data is not None:
+            self._engine.restore_mold_growth(last_extra_data.as_dict())
+        self._engine.async_subscribe(self, self._sensor_type, self._all_metrics)
+
+    def _restore_state(self, last_state):
+        """Show the last state until the engine calculates a new one."""
+        if last_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return
 
-        if unit == UnitOfTemperature.FAHRENHEIT:
-            return util.temperature.fahrenheit_to_celsius(temp)
-        if unit == UnitOfTemperature.CELSIUS:
-            return temp
-        _LOGGER.warning(
-            "Temp sensor %s has unsupported unit: %s (allowed: %s, %s)",
-            state.entity_id,
-            unit,
-            UnitOfTemperature.CELSIUS,
-            UnitOfTemperature.FAHRENHEIT,
+        self._state = last_state.state
+        self._available = True
+        self._attributes = MappingProxyType(
+            {
+                attribute: value
+                for attribute, value in last_state.attributes.items()
+                if attribute in METRICS or attribute == ATTR_CRITICAL_TEMP_SENSOR
+            }
         )
 
-        return None
-
-    @staticmethod
-    def _update_hum_sensor(state):
-        """Parse humidity sensor value."""
-        _LOGGER.debug("Updating humidity sensor with value %s", state.state)
-
-        if state.state == STATE_UNKNOWN:
-            _LOGGER.warning(
-                "Unable to parse humidity sensor %s, state: %s",
-                state.entity_id,
-                state.state,
-            )
-            return None
-
-        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
-        hum = util.convert(state.state, float)
-
-        if hum is None:
-            _LOGGER.warning(
-                "Unable to parse humidity sensor %s, state: %s",
-                state.entity_id,
-                state.state,
-            )
-            return None
-
-        if unit != PERCENTAGE:
-            _LOGGER.warning(
-                "Humidity sensor %s has unsupported unit: %s (allowed: %s)",
-                state.entity_id,
-                unit,
-                PERCENTAGE,
-            )
-            return None
-
-        if hum > 100 or hum < 0:
-            _LOGGER.warning(
-                "Humidity sensor %s is out of range: %s %s",
-                state.entity_id,
-                hum,
-                "(allowed: 0-100%)",
-            )
-            return None
-
-        return hum / 100
-
-    @staticmethod
-    def _update_pressure_sensor(state):
-        """Parse pressure sensor value."""
-        _LOGGER.debug("Updating pressure sensor with value %s", state.state)
-
-        if state.state == STATE_UNKNOWN:
-            _LOGGER.warning(
-                "Unable to parse pressure sensor %s, state: %s",
-                state.entity_id,
-                state.state,
-            )
+    @property
+    def extra_restore_state_data(self):
+        """Return the mold index of the room, to continue it after a restart."""
+        if self._engine.mold_growth is None:
             return None
+        return RestoredExtraData(self._engine.mold_growth.as_dict())
 
-        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
-        pressure = util.convert(state.state, float)
+    async def async_will_remove_from_hass(self):
+        """Unregister callbacks."""
+        self._engine.async_unsubscribe(self)
 
-        if pressure is None:
-            _LOGGER.warning(
-                "Unable to parse pressure sensor %s, state: %s",
-                state.entity_id,
-                state.state,
-            )
-            return None
-
-        if unit == UnitOfPressure.HPA:
-            return pressure * 100
+    @callback
+    def async_handle_engine_update(self):
+        """Publish the latest results from the shared engine."""
+        if self._stats is not None:
+            self._async_handle_engine_update_instrumented()
+            return
 
-        if unit == UnitOfPressure.PA:
-            return pressure
+        self._set_state()
+        if self._is_significant_change():
+            self.async_write_ha_state()
 
-        _LOGGER.error(
-            "Pressure sensor %s has unsupported unit: %s (allowed: %s, %s)",
-            state.entity_id,
-            unit,
-            UnitOfPressure.HPA,
-            UnitOfPressure.PA,
+    @callback
+    def _async_handle_engine_update_instrumented(self):
+        """Publish the latest results and record how long it took."""
+        start = time.perf_counter()
+        self._set_state()
+        significant = self._is_significant_change()
+        if significant:
+            # Reading the attributes calculates the remaining metrics.
+            self._results = dict(self._results)
+        self._stats.record_update(
+            self._sensor_type not in self._engine.restored,
+            (self._engine.last_update_duration or 0) + time.perf_counter() - start,
         )
-        return None
+
+        if significant:
+            self.async_write_ha_state()
+        else:
+            self._stats.record_skipped_update()
 
     async def async_update(self):
         """Calculate latest state."""
         _LOGGER.debug("Update state for %s", self.entity_id)
-
-        self._calc_dewpoint()
-        # TODO: Discover critical temperature from a list of provided sensors (lowest/highest?)
-        self._calc_critical_humidity()
-        self._calc_specific_humidity()
-        self._calc_comfortable_specific_humidity()
-        self._calc_comfortable_humidity()
-        self._calc_optimal_humidity()
-        self._calc_optimal_humidex()
-        self._set_mold_warning()
-        self._calc_humidex()
-        self._calc_humidex_comfort()
-
         self._set_state()
 
-    def _set_state(self):
-        """Set state based on sensor type"""
-        if self._sensor_type == ATTR_DEWPOINT:
-            self._state = self._dewpoint
-        elif self._sensor_type == ATTR_SPECIFIC_HUMIDITY:
-            self._state = self._specific_humidity
-        elif self._sensor_type == ATTR_OPTIMAL_HUMIDITY:
-            self._state = self._optimal_humidity
-        elif self._sensor_type == ATTR_CRITICAL_HUMIDITY:
-            self._state = self._crit_hum
-        elif self._sensor_type == ATTR_MOLD_WARNING:
-            self._state = self._mold_warning
-        elif self._sensor_type == ATTR_HUMIDEX:
-            self._state = self._humidex_attr
-        elif self._sensor_type == ATTR_OPTIMAL_HUMIDEX:
-            self._state = self._optimal_humidex
-        elif self._sensor_type == ATTR_HUMIDEX_COMFORT:
-            self._state = self._humidex_comfort
-        elif self._sensor_type == ATTR_COMFORTABLE_SPECIFIC_HUMIDITY:
-            self._state = self._comfortable_specific_humidity
-        elif self._sensor_type == ATTR_COMFORTABLE_HUMIDITY:
-            self._state = self._comfortable_humidity
-
-        if self._state is None:
-            self._available = False
-        else:
-            self._available = True
-
-    def _calc_humidex_comfort(self):
-        if self._humidex_attr is None:
-            self._humidex_comfort = None
-            return
+    def _is_significant_change(self):
+        """Return whether a tracked metric moved outside its deadband."""
+        if self._tracked_metrics is None:
+            return True
 
-        break_points = [29, 34, 39, 45, 54, 10000]
-        comfort_level = [
-            "Little or no discomfort",
-            "Noticeable discomfort",
-            "Evident discomfort",
-            "Intense discomfort; avoid exertion",
-            "Dangerous discomfort",
-            "Heat stroke probable",
-        ]
-        humidex_comfort = comfort_level[
-            bisect.bisect(break_points, self._humidex_attr - 1)
-        ]
-
-        self._humidex_comfort = humidex_comfort
-
-    def _humidex(self, temperature, humidity):
-        """Calculate humidex given temperature and humidity"""
-        # It equals H = T + (0.5555 * (e - 10)), where T is the temperature in Celsius and e is the vapor pressure in millibars (mb)
-        psychrolib.SetUnitSystem(psychrolib.SI)
-        vapor_pressure = psychrolib.GetVapPresFromRelHum(
-            temperature, humidity) * 0.01
-        return self._indoor_temp + (0.5555 * (vapor_pressure - 10))
-
-    def _calc_humidex(self):
-        """Calculate the humidex for the indoor air."""
-        if None in (self._indoor_temp, self._indoor_hum):
-            self._humidex_attr = None
-            return
-
-        humidex = self._humidex(self._indoor_temp, self._indoor_hum)
-        self._humidex_attr = float(f"{humidex:.2f}")
-
-    def _calc_dewpoint(self):
-        """Calculate the dewpoint for the indoor air."""
-
-        if None in (self._indoor_temp, self._indoor_hum):
-            self._dewpoint = None
-            return
-
-        psychrolib.SetUnitSystem(psychrolib.SI)
-        dewpoint = psychrolib.GetTDewPointFromRelHum(
-            self._indoor_temp, self._indoor_hum
-        )
-        self._dewpoint = float(f"{dewpoint:.2f}")
-
-        _LOGGER.debug("Dewpoint: %f %s", self._dewpoint, UnitOfTemperature.CELSIUS)
-
-    def _calc_specific_humidity(self):
-        """Calculate the specific humidity in the room."""
-        if None in (self._dewpoint, self._indoor_pressure):
-            self._specific_humidity = None
-            return
-
-        psychrolib.SetUnitSystem(psychrolib.SI)
-
-        specific_humidity = (
-            psychrolib.GetSpecificHumFromHumRatio(
-                psychrolib.GetHumRatioFromTDewPoint(
-                    self._dewpoint, self._indoor_pressure
-                )
-            )
-            * 1000
-        )
-        self._specific_humidity = float(f"{specific_humidity:.2f}")
-
-        _LOGGER.debug(
-            "Specific humidity: %s %s",
-            self._specific_humidity,
-            MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR,
-        )
-
-    def _calc_critical_humidity(self):
-        """Calculate the humidity at the critical temperature."""
-        if None in (self._dewpoint, self._crit_temp):
-
-            _LOGGER.debug(
-                "Invalid inputs - dewpoint: %s %s crit_temp: %s %s",
-                self._dewpoint,
-                UnitOfTemperature.CELSIUS,
-                self._crit_temp,
-                UnitOfTemperature.CELSIUS,
-            )
-            self._crit_hum = None
-            self._available = False
-            return
-
-        if self._dewpoint > self._crit_temp:
-            _LOGGER.debug("Dewpoint is above dry bulb temperature")
-            crit_humidity = 100
-        else:
-            psychrolib.SetUnitSystem(psychrolib.SI)
-            crit_humidity = (
-                psychrolib.GetRelHumFromTDewPoint(
-                    self._crit_temp, self._dewpoint) * 100
-            )
-
-        if crit_humidity > 100:
-            self._crit_hum = 100
-        elif crit_humidity < 0:
-            self._crit_hum = 0
-        else:
-            self._crit_hum = float(f"{crit_humidity:.1f}")
-
-        _LOGGER.debug("Critical humidity: %s", self._state)
-
-    def _set_mold_warning(self):
-        """Determine risk of mold"""
-        if None in (self._indoor_hum, self._crit_hum):
-            self._mold_warning = None
-            return
-
-        if float(self._indoor_hum) > 60:
-            self._mold_warning = True
-        elif self._crit_hum > 60:
-            self._mold_warning = True
-        else:
-            self._mold_warning = False
-
-        _LOGGER.debug("Risk of mold: %s", self._mold_warning)
-
-    def _calc_comfortable_specific_humidity(self):
-        """Calculate the comfortable specific humidity based on air pressure."""
-
-        if not self._comfortable_specific_humidity_from_config is None:
-            self._comfortable_specific_humidity = (
-                self._comfortable_specific_humidity_from_config
-            )
-            return
-
-        if self._indoor_pressure is None:
-            self._comfortable_specific_humidity = None
-            return
-
-        psychrolib.SetUnitSystem(psychrolib.SI)
-        comfortable_specific_humidity = (
-            psychrolib.GetSpecificHumFromHumRatio(
-                psychrolib.GetHumRatioFromRelHum(
-                    IDEAL_TEMPERATURE, IDEAL_HUMIDITY, self._indoor_pressure
-                )
-            )
-            * 1000
-        )
-        self._comfortable_specific_humidity = float(
-            f"{comfortable_specific_humidity:.2f}"
-        )
-        _LOGGER.debug(
-            "Optimal specific humidity set to %s%s",
-            self._comfortable_specific_humidity,
-            MILLIGRAMS_OF_WATER_TO_GRAMS_OF_AIR,
-        )
-
-    def _calc_optimal_humidex(self):
-        """Calculate the humidex at the optimal relative humidity."""
-        if None in (self._optimal_humidity, self._indoor_temp):
-            self._optimal_humidex = None
-            return
-        optimal_humidex = self._humidex(
-            self._indoor_temp, self._optimal_humidity / 100)
-        self._optimal_humidex = float(f"{optimal_humidex:.2f}")
-        _LOGGER.debug(
-            "Optimal humidex set to %s %s", self._optimal_humidex, UnitOfTemperature.CELSIUS
-        )
-
-    def _calc_comfortable_humidity(self):
-        """Calculate the comfortable humidity for the room."""
-        if None in (
-            self._indoor_temp,
-            self._indoor_pressure,
-            self._comfortable_specific_humidity,
+        values = {metric: self._results[metric] for metric in self._tracked_metrics}
+        if self._published is not None and not any(
+            self._has_moved(metric, self._published[metric], value)
+            for metric, value in values.items()
         ):
-            self._optimal_humidity = None
-            return
-
-        psychrolib.SetUnitSystem(psychrolib.SI)
-
-        comfortable_humidity = (
-            psychrolib.GetRelHumFromHumRatio(
-                self._indoor_temp,
-                psychrolib.GetHumRatioFromSpecificHum(
-                    self._comfortable_specific_humidity / 1000
-                ),
-                self._indoor_pressure,
-            )
-            * 100
-        )
-        _LOGGER.debug("Comfortable relative humidity is: %s",
-                      comfortable_humidity)
-        if comfortable_humidity > 100:
-            _LOGGER.warn(
-                "Not possible to reach a comfortable humidity at %s%s, will feel dry.",
-                self._indoor_temp,
-                UnitOfTemperature.CELSIUS,
-            )
-            comfortable_humidity = 100
-
-        self._comfortable_humidity = float(f"{comfortable_humidity:.2f}")
-        _LOGGER.debug("Comfortable humidity is %s", self._comfortable_humidity)
+            _LOGGER.debug("Change for %s is within the deadband", self.entity_id)
+            return False
 
-    def _calc_optimal_humidity(self):
-        """Calculate the optimal humidity for the room."""
+        self._published = values
+        return True
 
-        if None in (
-            self._indoor_temp,
-            self._crit_temp,
-            self._comfortable_specific_humidity,
-            self._comfortable_humidity,
-        ):
-            self._optimal_humidity = None
-            return
+    def _has_moved(self, metric, old_value, new_value):
+        """Return whether a metric moved by more than its deadband."""
+        if None in (old_value, new_value) or isinstance(new_value, (bool, str)):
+            return old_value != new_value
 
-        psychrolib.SetUnitSystem(psychrolib.SI)
+        change = abs(new_value - old_value)
+        absolute = self._deadband.get(metric)
+        relative = self._relative_deadband.get(metric)
+        if absolute is None and relative is None:
+            return change > 0
 
-        comfortable_dew_point = psychrolib.GetTDewPointFromRelHum(
-            self._indoor_temp, self._comfortable_humidity / 100
+        return (absolute is None or change > absolute) and (
+            relative is None or change > abs(old_value) * relative
         )
 
-        _LOGGER.debug("Comfortable dewpoint is %s", comfortable_dew_point)
-
-        if comfortable_dew_point > self._crit_temp:
-            _LOGGER.debug(
-                "Comfortable dewpoint is above critical dry bulb temperature")
-            critical_humidity = 1
-        else:
-            critical_humidity = psychrolib.GetRelHumFromTDewPoint(
-                self._crit_temp, comfortable_dew_point
-            )
-
-        _LOGGER.debug("Critical humidity is %s", critical_humidity)
-
-        if critical_humidity > 0.6:
-            # given condensation + mold forms at or above 60% RH at the _crit_temp; get dew point
-            dew_point = psychrolib.GetTDewPointFromRelHum(self._crit_temp, 0.6)
-            if dew_point > self._indoor_temp:
-                _LOGGER.warn(
-                    "Not possible to reach a mold free humidity at %s%s and %s%s given a critical temperature of %s%s and humidity of %s%s",
-                    self._indoor_temp,
-                    UnitOfTemperature.CELSIUS,
-                    self._indoor_hum * 100,
-                    PERCENTAGE,
-                    self._crit_temp,
-                    UnitOfTemperature.CELSIUS,
-                    critical_humidity * 100,
-                    PERCENTAGE,
-                )
-                self._optimal_humidity = None
-                return
-            else:
-                optimal_humidity = (
-                    psychrolib.GetRelHumFromTDewPoint(
-                        self._indoor_temp, dew_point)
-                    * 100
-                )
-        else:
-            optimal_humidity = self._comfortable_humidity
+    def _set_state(self):
+        """Set state based on sensor type"""
+        self._results = self._engine.results
+        self._attributes = None
+        self._state = self._results.get(self._sensor_type)
 
-        if optimal_humidity > 60:
-            self._optimal_humidity = 60
-        elif optimal_humidity < 0:
-            self._optimal_humidity = 0
+        if self._state is None:
+            self._available = False
         else:
-            self._optimal_humidity = float(f"{optimal_humidity:.1f}")
-
-        _LOGGER.debug("Optimal humidity: %s %s",
-                      self._optimal_humidity, PERCENTAGE)
+            self._available = True
 
     @property
     def should_poll(self):
@@ -736,6 +485,11 @@ class OptimalHumidity(Entity):
         """Return the name."""
         return self._name
 
+    @property
+    def unique_id(self):
+        """Return the unique id of a sensor added from the UI."""
+        return self._unique_id
+
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
@@ -774,42 +528,71 @@ class OptimalHumidity(Entity):
 
     @property
     def extra_state_attributes(self):
-        """Return the state attributes."""
+        """Return the state attributes.
+
+        They are built when first read after an update and shared by every
+        read until the next one, so they are read-only.
+        """
+        if self._attributes is None:
+            self._attributes = MappingProxyType(self._build_attributes())
+        return self._attributes
+
+    def _build_attributes(self):
+        """Return the state attributes from the latest results."""
+        attributes = dict(self._results)
+        self._add_engine_attributes(attributes)
         if self._is_metric:
-            return {
-                ATTR_DEWPOINT: self._dewpoint,
-                ATTR_SPECIFIC_HUMIDITY: self._specific_humidity,
-                ATTR_OPTIMAL_HUMIDITY: self._optimal_humidity,
-                ATTR_CRITICAL_HUMIDITY: self._crit_hum,
-                ATTR_MOLD_WARNING: self._mold_warning,
-                ATTR_HUMIDEX: self._humidex_attr,
-                ATTR_HUMIDEX_COMFORT: self._humidex_comfort,
-                ATTR_COMFORTABLE_SPECIFIC_HUMIDITY: self._comfortable_specific_humidity,
-                ATTR_OPTIMAL_HUMIDEX: self._optimal_humidex,
-                ATTR_COMFORTABLE_HUMIDITY: self._comfortable_humidity,
-            }
+            return attributes
+
+        for attribute in TEMPERATURE_ATTRIBUTES:
+            if attributes.get(attribute) is not None:
+                attributes[attribute] = round(
+                    TemperatureConverter.convert(
+                        attributes[attribute],
+                        UnitOfTemperature.CELSIUS,
+                        UnitOfTemperature.FAHRENHEIT,
+                    ),
+                    2,
+                )
 
-        dewpoint = (
-            util.temperature.celsius_to_fahrenheit(self._dewpoint)
-            if self._dewpoint is not None
-            else None
-        )
+        return attributes
+
+    def _add_engine_attributes(self, attributes):
+        """Add the attributes describing the engine rather than a metric."""
+        if len(self._engine.critical_temp_sensors) > 1:
+            attributes[ATTR_CRITICAL_TEMP_SENSOR] = self._engine.critical_temp_sensor
+        if self._engine.input_faults:
+            attributes[ATTR_INPUT_FAULT] = dict(self._engine.input_faults)
+        if self._stats is not None:
+            attributes[ATTR_DIAGNOSTICS] = self._stats.as_dict(self._engine)
+
+
+class OptimalHumidityMetric(OptimalHumidity):
+    """Represents a single metric of a room with an entity per metric.
 
-        humidex = (
-            util.temperature.celsius_to_fahrenheit(self._humidex_attr)
-            if self._humidex_attr is not None
+    Only the metric of the entity is published, without the other metrics as
+    attributes, so each input change calculates just the monitored metrics.
+    """
+
+    _all_metrics = False
+
+    def __init__(self, *args):
+        """Initialize the sensor."""
+        super().__init__(*args)
+        self._tracked_metrics = (
+            {self._sensor_type}
+            if self._sensor_type in self._deadband
+            or self._sensor_type in self._relative_deadband
             else None
         )
 
-        return {
-            ATTR_DEWPOINT: dewpoint,
-            ATTR_SPECIFIC_HUMIDITY: self._specific_humidity,
-            ATTR_OPTIMAL_HUMIDITY: self._optimal_humidity,
-            ATTR_CRITICAL_HUMIDITY: self._crit_hum,
-            ATTR_MOLD_WARNING: self._mold_warning,
-            ATTR_HUMIDEX: humidex,
-            ATTR_HUMIDEX_COMFORT: self._humidex_comfort,
-            ATTR_COMFORTABLE_SPECIFIC_HUMIDITY: self._comfortable_specific_humidity,
-            ATTR_OPTIMAL_HUMIDEX: self._optimal_humidex,
-            ATTR_COMFORTABLE_HUMIDITY: self._comfortable_humidity,
-        }
+    def _set_state(self):
+        """Set state based on sensor type"""
+        super()._set_state()
+        self._results = {self._sensor_type: self._state}
+
+    def _build_attributes(self):
+        """Return the state attributes from the latest results."""
+        attributes = {}
+        self._add_engine_attributes(attributes)
+        return attributes